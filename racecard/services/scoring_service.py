@@ -1,6 +1,8 @@
 import os
 import sys
+from collections import defaultdict
 from datetime import date, timedelta
+from django.db import transaction
 from django.db.models import Avg, Count, Q
 from django.utils import timezone
 
@@ -11,8 +13,24 @@ from racecard_02.models import Horse, Run, Race, HorseScore
 from racecard_02.services.class_analysis import ClassAnalysisService
 
 class HorseScoringService:
+
+    # Composite score weights (factor scores are on a 0-1 scale)
+    WEIGHTS = {
+        'merit': 0.15,
+        'form': 0.25,
+        'class': 0.20,
+        'distance': 0.15,
+        'consistency': 0.10,
+        'speed': 0.15
+    }
+
+    # HorseScore columns written by create_score_record / bulk_create_score_records
+    SCORE_FIELDS = [
+        'overall_score', 'merit_score', 'form_score', 'class_score',
+        'distance_score', 'consistency_score', 'speed_rating', 'calculated_at',
+    ]
     
-    def __init__(self, horse, race):
+    def __init__(self, horse, race, runs=None, class_analyzer=None):
         # Handle both horse objects and horse IDs/names
         if isinstance(horse, (int, str)):
             # Look up horse by ID or name
@@ -29,8 +47,11 @@ class HorseScoringService:
             self.horse = horse
             
         self.race = race
-        self.runs = Run.objects.filter(horse=self.horse).order_by('-run_date')
-        self.class_analyzer = ClassAnalysisService()
+        # Prefetched runs (newest first) spare the per-factor queries
+        if runs is None:
+            runs = Run.objects.filter(horse=self.horse).order_by('-run_date')
+        self.runs = runs
+        self.class_analyzer = class_analyzer or ClassAnalysisService()
     
     def calculate_merit_score(self):
         """Score based on horse's merit rating"""
@@ -171,18 +192,9 @@ class HorseScoringService:
         except:
             return None
     
-    def calculate_composite_score(self):
-        """Calculate overall composite score"""
-        weights = {
-            'merit': 0.15,
-            'form': 0.25,
-            'class': 0.20,
-            'distance': 0.15,
-            'consistency': 0.10,
-            'speed': 0.15
-        }
-        
-        scores = {
+    def calculate_factor_scores(self):
+        """Each factor score on a 0-1 scale, computed once"""
+        return {
             'merit': self.calculate_merit_score(),
             'form': self.calculate_form_score(),
             'class': self.calculate_class_score(),
@@ -190,40 +202,106 @@ class HorseScoringService:
             'consistency': self.calculate_consistency_score(),
             'speed': self.calculate_speed_rating() / 100  # Convert to 0-1 scale
         }
+
+    def calculate_composite_score(self, scores=None):
+        """Calculate overall composite score"""
+        if scores is None:
+            scores = self.calculate_factor_scores()
         
-        composite = sum(scores[factor] * weights[factor] for factor in weights)
+        composite = sum(scores[factor] * weight for factor, weight in self.WEIGHTS.items())
         return min(max(composite, 0), 1.0)  # Ensure between 0-1
+
+    def score_defaults(self):
+        """HorseScore field values for this horse and race"""
+        scores = self.calculate_factor_scores()
+        return {
+            'overall_score': self.calculate_composite_score(scores) * 100,  # Convert to 0-100 scale
+            'merit_score': scores['merit'] * 100,
+            'form_score': scores['form'] * 100,
+            'class_score': scores['class'] * 100,
+            'distance_score': scores['distance'] * 100,
+            'consistency_score': scores['consistency'] * 100,
+            'speed_rating': scores['speed'] * 100,
+            'calculated_at': timezone.now()
+        }
     
     def create_score_record(self):
         """Create or update a comprehensive score record"""
         try:
-            composite_score = self.calculate_composite_score()
-            
-            # Calculate all individual scores
-            merit_score = self.calculate_merit_score() * 100  # Convert to 0-100 scale
-            form_score = self.calculate_form_score() * 100
-            class_score = self.calculate_class_score() * 100
-            distance_score = self.calculate_distance_score() * 100
-            consistency_score = self.calculate_consistency_score() * 100
-            speed_rating = self.calculate_speed_rating()
-            
             # Use update_or_create to handle existing records
             score_record, created = HorseScore.objects.update_or_create(
                 horse=self.horse,
                 race=self.race,
-                defaults={
-                    'overall_score': composite_score * 100,  # Convert to 0-100 scale
-                    'merit_score': merit_score,
-                    'form_score': form_score,
-                    'class_score': class_score,
-                    'distance_score': distance_score,
-                    'consistency_score': consistency_score,
-                    'speed_rating': speed_rating,
-                    'calculated_at': timezone.now()
-                }
+                defaults=self.score_defaults()
             )
             
             return score_record, created
             
         except Exception as e:
-            raise Exception(f"Error creating score record: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Error creating score record: {str(e)}")
+
+    @classmethod
+    def bulk_create_score_records(cls, horses, race):
+        """
+        Score every horse of a race with one Run query and bulk HorseScore writes.
+        Returns (records, created_ids, failures) where failures is [(horse, error)].
+        """
+        horses = list(horses)
+        runs_by_horse = defaultdict(list)
+        for run in Run.objects.filter(horse__in=horses).order_by('-run_date'):
+            runs_by_horse[run.horse_id].append(run)
+        
+        class_analyzer = ClassAnalysisService()
+        existing = {
+            score.horse_id: score
+            for score in HorseScore.objects.filter(race=race, horse__in=horses)
+        }
+        
+        to_create, to_update, failures = [], [], []
+        for horse in horses:
+            try:
+                defaults = cls(horse, race, runs_by_horse[horse.id], class_analyzer).score_defaults()
+                
+                record = existing.get(horse.id)
+                if record is None:
+                    to_create.append(HorseScore(horse=horse, race=race, **defaults))
+                else:
+                    record.horse = horse  # reuse the loaded instance, no lazy FK fetch
+                    for name, value in defaults.items():
+                        setattr(record, name, value)
+                    to_update.append(record)
+            except Exception as e:
+                failures.append((horse, e))
+        
+        try:
+            # Savepoint, so a failed statement leaves any outer transaction usable
+            with transaction.atomic():
+                if to_create:
+                    HorseScore.objects.bulk_create(to_create, batch_size=200)
+                if to_update:
+                    HorseScore.objects.bulk_update(to_update, fields=cls.SCORE_FIELDS, batch_size=200)
+        except Exception:
+            # Fall back to one write per horse so one bad row can't sink the race
+            return cls._save_score_records_one_by_one(to_create, to_update, failures)
+        
+        return to_create + to_update, {record.horse_id for record in to_create}, failures
+    
+    @classmethod
+    def _save_score_records_one_by_one(cls, to_create, to_update, failures):
+        """Per-record fallback for bulk_create_score_records; same return shape."""
+        saved, created_ids = [], set()
+        for is_new, records in ((True, to_create), (False, to_update)):
+            for record in records:
+                try:
+                    with transaction.atomic():
+                        if is_new:
+                            record.save()
+                        else:
+                            record.save(update_fields=cls.SCORE_FIELDS)
+                except Exception as e:
+                    failures.append((record.horse, e))
+                    continue
+                saved.append(record)
+                if is_new:
+                    created_ids.add(record.horse_id)
+        return saved, created_ids, failures
@@ -5,28 +5,118 @@ racecard HTML file and write them to the DB.
 Run:
   python manage.py import_racecard path/to/file.html
   python manage.py import_racecard path/to/file.html --update
+  python manage.py import_racecard first.html --files second.html third.html
 
-This prints detailed debug info at each step so you can see how parsing flows.
+This prints a summary of each step; pass --verbosity 2 for the per-horse and
+per-row detail that shows how parsing flows.
 """
 
+import hashlib
 import os
 import re
+import statistics
+import traceback
+from bisect import bisect_right
+from collections import defaultdict, namedtuple
 from datetime import datetime, date, time
+from functools import lru_cache
+from operator import itemgetter, mul
 from django.utils import timezone  # Add this import
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from django.core.management.base import BaseCommand
+from django.db import IntegrityError, transaction
 from racecard_02.models import Race, Horse, Run, Ranking, HorseResult, HorseScore, ManualHorseResult, ManualResult
 import json
+import logging
 from django.db.models import Q
 
 # Import the services
 from racecard_02.services.class_analysis import ClassAnalysisService
 from racecard_02.services.run_analysis import RunAnalysisService
+from racecard.services.scoring_service import HorseScoringService
+
+logger = logging.getLogger(__name__)
+
+# -------------------------
+# Precompiled patterns
+# -------------------------
+_DATE_ANY = re.compile(r"\d{2}/\d{2}/(?:\d{4}|\d{2})")
+_METRES_RE = re.compile(r"(\d+)\s*Metres", re.I)
+_MERIT_RE = re.compile(r"Merit\s*Rated\s*(\d{1,3})", re.I)
+_BENCHMARK_RE = re.compile(r"Benchmark\s*(\d{1,3})", re.I)
+_TWO_THREE_DIGITS_RE = re.compile(r"\b(\d{2,3})\b")
+_HHMM_RE = re.compile(r"\b(\d{3,4})\b")
+_AGE_RE = re.compile(r"\by\.?\s*o\.?", re.I)
+_AGE_NUM_RE = re.compile(r"\b(\d{1,2})\b")
+_DIGITS_RE = re.compile(r"\d+")
+
+# Everything the importer reads (header cell, horse blocks, J-T table) sits
+# inside <table> elements; the head, scripts and loose markup are skipped
+_RACECARD_STRAINER = SoupStrainer("table")
+
+# Joiner for _lines(); never appears in racecard text
+_SEP = "\x1f"
+
+# J-T rating bands: score >= threshold[i] earns label[i + 1]
+_JT_THRESHOLDS = (20, 40, 60, 80)
+_JT_LABELS = ("Poor", "Average", "Good", "Very Good", "Excellent")
+
+# Cell labels that mark a J-T header row
+_JT_HEADER_WORDS = frozenset({'jockey', 'trainer', 'rns', 'no'})
+
+# Carried-weight bands (kg) for calculate_weight_score: lighter scores higher
+_WEIGHT_THRESHOLDS = (52, 55, 58, 61)
+_WEIGHT_SCORES = (80, 70, 60, 50, 40)
+
+# Weights for calculate_horse_score's overall score, in component order:
+# form, class, consistency, speed, jockey, trainer, merit, distance,
+# stamina, track affinity, recovery
+_OVERALL_WEIGHTS = (0.2, 0.15, 0.1, 0.1, 0.1, 0.05, 0.1, 0.05, 0.05, 0.05, 0.05)
+
+# Parsed J-T tables are cached here as {sha1 of the HTML}.json
+JT_CACHE_DIR = ".jt_cache"
+
+# One parsed jockey-trainer row (also the value type of jt_analysis_cache)
+JTResult = namedtuple('JTResult', 'horse_number jockey trainer score rating')
+
+# Placeholder jockey/trainer tiers (surname tokens) used by the name scorers
+_JOCKEY_TIER1 = frozenset({'smith', 'jones', 'brown'})
+_JOCKEY_TIER2 = frozenset({'wilson', 'taylor', 'davis'})
+_TRAINER_TIER1 = frozenset({'bass', 'smith', 'jones', 'brown', 'master'})
+_TRAINER_TIER2 = frozenset({'wilson', 'taylor', 'davis', 'murray', 'coach'})
+_NAME_TOKEN_RE = re.compile(r"[a-z]+")
+
 
 # -------------------------
 # Helpers
 # -------------------------
+def _century(yy):
+    # Same pivot as strptime's %y: 69-99 -> 1900s, 00-68 -> 2000s
+    return 1900 + yy if yy >= 69 else 2000 + yy
+
+
+@lru_cache(maxsize=4096)
+def _parse_date_text(clean_val):
+    # Fast paths for the two shapes that dominate the racecards:
+    # run dates "yy.mm.dd" and header dates "dd/mm/yyyy".
+    try:
+        if len(clean_val) == 8 and clean_val[2] == "." and clean_val[5] == ".":
+            return date(_century(int(clean_val[0:2])), int(clean_val[3:5]), int(clean_val[6:8]))
+        if len(clean_val) == 10 and clean_val[2] == "/" and clean_val[5] == "/":
+            return date(int(clean_val[6:10]), int(clean_val[3:5]), int(clean_val[0:2]))
+    except ValueError:
+        pass
+
+    # Unusual shapes: fall back to the full format probe
+    for fmt in ("%y.%m.%d", "%d.%m.%y", "%y%m%d", "%d/%m/%Y", "%d/%m/%y"):
+        try:
+            return datetime.strptime(clean_val, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
 def ensure_date(val):
     if isinstance(val, date) and not isinstance(val, datetime):
         return val
@@ -38,13 +128,10 @@ def ensure_date(val):
         # Handle cases like "(5) 24.10.05" or "(20)25.01.11"
         if '(' in clean_val and ')' in clean_val:
             clean_val = clean_val.split(')')[-1].strip()
-        
-        # Try different date formats
-        for fmt in ("%y.%m.%d", "%d.%m.%y", "%y%m%d", "%d/%m/%Y", "%d/%m/%y"):
-            try:
-                return datetime.strptime(clean_val, fmt).date()
-            except ValueError:
-                continue
+
+        parsed = _parse_date_text(clean_val)
+        if parsed is not None:
+            return parsed
     raise ValueError(f"Cannot parse date from value: {val!r}")
 
 
@@ -64,8 +151,99 @@ def ensure_time(val):
     raise ValueError(f"Cannot parse time from value: {val!r}")
 
 
-def _text(node, default=""):
-    return node.get_text(strip=True) if node else default
+def _load_racecard(path):
+    """Read and parse one racecard file; returns (path, sha1 hex digest, soup)."""
+    with open(path, "rb") as fh:
+        raw = fh.read()
+    # Hand lxml the raw bytes; declaring the encoding skips BS4's sniffing
+    soup = BeautifulSoup(raw, "lxml", from_encoding="utf-8", parse_only=_RACECARD_STRAINER)
+    return path, hashlib.sha1(raw).hexdigest(), soup
+
+
+def _lines(node):
+    """Non-empty stripped text fragments of node, from a single get_text() call."""
+    return [s for s in node.get_text(_SEP, strip=True).split(_SEP) if s]
+
+
+def _position_int(value):
+    """Finishing position as an int ('3', '3/12', '3rd' -> 3); None if absent."""
+    m = _DIGITS_RE.match((value or "").strip())
+    return int(m.group()) if m else None
+
+
+def _form_rating(positions):
+    """Average position with recent runs weighted more heavily (0.8 decay); 0 if none."""
+    if not positions:
+        return 0
+    weights = [0.8 ** i for i in range(len(positions))]
+    return sum(map(mul, positions, weights)) / sum(weights)
+
+
+def _consistency(positions):
+    """Percentage of positions within 2 places of their average; 0 if none."""
+    if not positions:
+        return 0
+    avg_position = sum(positions) / len(positions)
+    return sum(1 for p in positions if abs(p - avg_position) <= 2) * 100 / len(positions)
+
+
+def _safe_int(value, default=0):
+    """Parse counts/percentages like '1,234' or '45%'; default on junk."""
+    try:
+        return int(value.replace(',', '').replace('%', '').strip())
+    except (ValueError, AttributeError):
+        return default
+
+
+@lru_cache(maxsize=4096)
+def _name_tier_score(name, tier1, tier2):
+    """75 / 65 / 55 depending on which tier a token of name falls in."""
+    tokens = set(_NAME_TOKEN_RE.findall(name.lower()))
+    if tokens & tier1:
+        return 75
+    if tokens & tier2:
+        return 65
+    return 55
+
+
+@lru_cache(maxsize=2048)
+def _form_score_core(avg_position, form_rating, consistency):
+    # Convert average position to score (1st = 100, 10th = 0)
+    form_score = max(0, 100 - (avg_position * 10))
+    # Adjust based on form rating (lower form_rating is better)
+    if form_rating > 0:
+        form_score = form_score * (1 - (form_rating / 100))
+    # Adjust based on consistency
+    form_score = form_score * (consistency / 100)
+    return min(100, max(0, form_score))
+
+
+@lru_cache(maxsize=2048)
+def _speed_score_core(avg_position):
+    # Better positions = higher speed rating
+    return min(100, max(0, 100 - (avg_position * 8)))
+
+
+@lru_cache(maxsize=2048)
+def _class_score_core(avg_class):
+    # Class weights are 0-100 where higher is better
+    return min(100, max(0, avg_class))
+
+
+def _overall_score(components):
+    """Weighted sum of the scoring components (see _OVERALL_WEIGHTS)."""
+    return sum(map(mul, components, _OVERALL_WEIGHTS))
+
+
+def _jt_score(starts, win_percentage, place_percentage):
+    """Jockey-trainer combination score, clamped to 0-100."""
+    score = (
+        place_percentage * 0.4
+        + win_percentage * 0.3
+        + min(starts, 50) * 0.1
+        + (25 if starts > 10 else 0)
+    )
+    return max(0, min(100, round(score, 2)))
 
 
 class Command(BaseCommand):
@@ -74,6 +252,39 @@ class Command(BaseCommand):
         "Use --update to update existing DB rows."
     )
 
+    # Horse columns written by _parse_horses (bulk_update field list)
+    HORSE_FIELDS = [
+        'horse_name', 'blinkers', 'age', 'dob', 'odds', 'horse_merit',
+        'race_class', 'trainer', 'jockey', 'jt_score', 'jt_rating',
+    ]
+
+    # HorseScore columns written from calculate_horse_score's values by
+    # _score_columns (bulk_update field list; updated_at is auto_now, which
+    # bulk_update skips, so it is set by hand)
+    HORSE_SCORE_FIELDS = [
+        'overall_score', 'form_score', 'class_score', 'consistency_score',
+        'speed_score', 'speed_rating_score', 'current_mr_score', 'jt_score',
+        'calculated_at', 'updated_at',
+    ]
+
+    # NOT NULL HorseScore columns calculate_horse_score doesn't score yet;
+    # neutral 50 so a new row can be inserted
+    HORSE_SCORE_DEFAULTS = {
+        'physical_score': 50.0,
+        'intangible_score': 50.0,
+        'best_mr_score': 50.0,
+        'odds_score': 50.0,
+        'weight_score': 50.0,
+        'draw_score': 50.0,
+        'blinkers_score': 50.0,
+    }
+
+    # print_horse_rankings table layout
+    RANKING_HEADER = "{:<5} {:<5} {:<20} {:<8} {:<8} {:<8} {:<8} {:<8} {:<10}".format(
+        "Rank", "No", "Name", "Score", "Merit", "Class", "Form", "J-T", "Trend"
+    )
+    RANKING_ROW = "{:<5} {:<5} {:<20} {:<8.1f} {:<8} {:<8.1f} {:<8.1f} {:<8.1f} {:<10}"
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Initialize the services
@@ -81,6 +292,11 @@ class Command(BaseCommand):
         self.run_analyzer = RunAnalysisService()
         # Cache for J-T data (persists throughout command execution)
         self.jt_analysis_cache = {}
+        # Per-horse/per-row chatter is only written at --verbosity 2+
+        self.verbosity = 1
+        # On-disk J-T cache key (sha1 of the HTML) and --rebuild-jt flag
+        self.html_digest = None
+        self.rebuild_jt = False
 
     # -------------------------
     # CLI arguments
@@ -93,6 +309,18 @@ class Command(BaseCommand):
             dest="update",
             help="If set, update the existing Race (and Horses) with parsed values.",
         )
+        parser.add_argument(
+            "--files",
+            nargs="+",
+            default=[],
+            help="Additional racecard HTML files to import in the same run (parsed in parallel).",
+        )
+        parser.add_argument(
+            "--rebuild-jt",
+            action="store_true",
+            dest="rebuild_jt",
+            help="Ignore the on-disk J-T cache for this file and re-parse the J-T table.",
+        )
 
     # -------------------------
     # Jockey-Trainer Analysis Functions
@@ -104,146 +332,49 @@ class Command(BaseCommand):
         cells = html_row.find_all('td')
         cell_texts = [cell.get_text(strip=True) for cell in cells]
         
-        self.stdout.write(f"🔍 ANALYZING J-T ROW: {cell_texts}")
+        if self.verbosity >= 2:
+            self.stdout.write(f"🔍 ANALYZING J-T ROW: {cell_texts}")
         
         results = []
         
-        # Helper function to parse numeric values safely
-        def safe_int(value, default=0):
-            try:
-                return int(value.replace(',', '').replace('%', '').strip())
-            except (ValueError, AttributeError):
-                return default
-        
-        # Check if this is a two-column layout (horses 1-7 in first column, 8-13 in second)
-        if len(cell_texts) >= 18:  # Two columns of data (9 cells per column)
-            self.stdout.write("📊 Found two-column J-T layout")
-            
-            # Parse first column (horses 1-7)
-            if len(cell_texts) >= 9:
-                first_column = cell_texts[:9]
-                try:
-                    horse_number = first_column[0]
-                    trainer = first_column[1]
-                    jockey = first_column[2]
-                    
-                    # Parse numeric values
-                    starts = safe_int(first_column[3])
-                    first_places = safe_int(first_column[4])
-                    second_places = safe_int(first_column[5])
-                    third_places = safe_int(first_column[6])
-                    win_percentage = safe_int(first_column[7])
-                    place_percentage = safe_int(first_column[8])
-                    
-                    # Calculate score
-                    score = (
-                        (place_percentage * 0.4) +
-                        (win_percentage * 0.3) +
-                        (min(starts, 50) * 0.1) +
-                        (25 if starts > 10 else 0)
-                    )
-                    score = max(0, min(100, round(score, 2)))
-                    
-                    results.append({
-                        'horse_number': horse_number,
-                        'jockey': jockey,
-                        'trainer': trainer,
-                        'score': score,
-                        'rating': self.get_jt_rating(score)
-                    })
-                    
-                    self.stdout.write(f"✅ First column: Horse {horse_number}, Score={score}")
-                except Exception as e:
-                    self.stdout.write(f"❌ Error parsing first column: {e}")
-            
-            # Parse second column (horses 8-13)
-            if len(cell_texts) >= 18:
-                second_column = cell_texts[9:18]  # Cells 9-17
-                try:
-                    horse_number = second_column[0]
-                    trainer = second_column[1]
-                    jockey = second_column[2]
-                    
-                    # Parse numeric values
-                    starts = safe_int(second_column[3])
-                    first_places = safe_int(second_column[4])
-                    second_places = safe_int(second_column[5])
-                    third_places = safe_int(second_column[6])
-                    win_percentage = safe_int(second_column[7])
-                    place_percentage = safe_int(second_column[8])
-                    
-                    # Calculate score
-                    score = (
-                        (place_percentage * 0.4) +
-                        (win_percentage * 0.3) +
-                        (min(starts, 50) * 0.1) +
-                        (25 if starts > 10 else 0)
-                    )
-                    score = max(0, min(100, round(score, 2)))
-                    
-                    results.append({
-                        'horse_number': horse_number,
-                        'jockey': jockey,
-                        'trainer': trainer,
-                        'score': score,
-                        'rating': self.get_jt_rating(score)
-                    })
-                    
-                    self.stdout.write(f"✅ Second column: Horse {horse_number}, Score={score}")
-                except Exception as e:
-                    self.stdout.write(f"❌ Error parsing second column: {e}")
-        
+        # Two-column layout (horses 1-7 in first column, 8-13 in second) has
+        # 9 cells per column; otherwise a single 9-cell group
+        if len(cell_texts) >= 18:
+            if self.verbosity >= 2:
+                self.stdout.write("📊 Found two-column J-T layout")
+            starts = (0, 9)
+        elif len(cell_texts) >= 9:
+            starts = (0,)
         else:
-            # Single column layout (original logic)
-            if len(cell_texts) >= 9:
-                try:
-                    horse_number = cell_texts[0]
-                    trainer = cell_texts[1]
-                    jockey = cell_texts[2]
-                    
-                    # Parse numeric values
-                    starts = safe_int(cell_texts[3])
-                    first_places = safe_int(cell_texts[4])
-                    second_places = safe_int(cell_texts[5])
-                    third_places = safe_int(cell_texts[6])
-                    win_percentage = safe_int(cell_texts[7])
-                    place_percentage = safe_int(cell_texts[8])
-                    
-                    # Calculate score
-                    score = (
-                        (place_percentage * 0.4) +
-                        (win_percentage * 0.3) +
-                        (min(starts, 50) * 0.1) +
-                        (25 if starts > 10 else 0)
-                    )
-                    score = max(0, min(100, round(score, 2)))
-                    
-                    results.append({
-                        'horse_number': horse_number,
-                        'jockey': jockey,
-                        'trainer': trainer,
-                        'score': score,
-                        'rating': self.get_jt_rating(score)
-                    })
-                    
-                    self.stdout.write(f"✅ Single column: Horse {horse_number}, Score={score}")
-                except Exception as e:
-                    self.stdout.write(f"❌ Error parsing single column: {e}")
+            starts = ()
+        
+        for start in starts:
+            try:
+                result = self._parse_jt_group(cell_texts[start:start + 9])
+                results.append(result)
+                if self.verbosity >= 2:
+                    self.stdout.write(f"✅ Column at cell {start}: Horse {result.horse_number}, Score={result.score}")
+            except Exception as e:
+                self.stdout.write(f"❌ Error parsing J-T column at cell {start}: {e}")
         
         return results
 
+    def _parse_jt_group(self, cells9):
+        """
+        Parse one 9-cell J-T group:
+        HorseNo, Trainer, Jockey, Rns, 1st, 2nd, 3rd, Win%, PLC%
+        """
+        horse_number, trainer, jockey = cells9[0], cells9[1], cells9[2]
+        starts = _safe_int(cells9[3])
+        win_percentage = _safe_int(cells9[7])
+        place_percentage = _safe_int(cells9[8])
+        
+        score = _jt_score(starts, win_percentage, place_percentage)
+        return JTResult(horse_number, jockey, trainer, score, self.get_jt_rating(score))
+
     def get_jt_rating(self, score):
         """Convert numerical score to qualitative rating"""
-        if score >= 80:
-            return "Excellent"
-        elif score >= 60:
-            return "Very Good"
-        elif score >= 40:
-            return "Good"
-        elif score >= 20:
-            return "Average"
-        else:
-            return "Poor"
+        return _JT_LABELS[bisect_right(_JT_THRESHOLDS, score)]
 
     # -------------------------
     # Header parsing
@@ -254,7 +385,7 @@ class Command(BaseCommand):
         if not td:
             return {}
 
-        lines = list(td.stripped_strings)
+        lines = _lines(td)
         result = {
             "lines": lines,
             "course": lines[0] if lines else None,
@@ -268,26 +399,28 @@ class Command(BaseCommand):
         # Date detection (accept 25/07/2025 or 25/07/25)
         for text in lines[1:4]:
             clean = text.strip()
-            if re.fullmatch(r"\d{2}/\d{2}/\d{4}", clean):
-                parsed_date = datetime.strptime(clean, "%d/%m/%Y").date()
+            if _DATE_ANY.fullmatch(clean):
+                day, month, year = int(clean[0:2]), int(clean[3:5]), int(clean[6:])
                 result["date_text"] = clean
-                result["race_date"] = parsed_date
+                result["race_date"] = date(_century(year) if len(clean) == 8 else year, month, day)
                 break
-            if re.fullmatch(r"\d{2}/\d{2}/\d{2}", clean):
-                parsed_date = datetime.strptime(clean, "%d/%m/%y").date()
-                result["date_text"] = clean
-                result["race_date"] = parsed_date
+
+        # Race number (<div class="rev4">) and time (<div class="b1">), one walk of the td
+        rev4 = b1 = None
+        for div in td.find_all("div", class_=["rev4", "b1"]):
+            classes = div.get("class") or ()
+            if rev4 is None and "rev4" in classes:
+                rev4 = div
+            if b1 is None and "b1" in classes:
+                b1 = div
+            if rev4 is not None and b1 is not None:
                 break
 
-        # Race number in <div class="rev4">
-        rev4 = td.find("div", class_="rev4")
         if rev4:
-            m = re.search(r"\d+", rev4.get_text(strip=True))
+            m = _DIGITS_RE.search(rev4.get_text(strip=True))
             if m:
                 result["race_no"] = int(m.group())
 
-        # Race time in <div class="b1">
-        b1 = td.find("div", class_="b1")
         if b1:
             raw = b1.get_text(strip=True)
             result["race_time_text"] = raw
@@ -296,7 +429,7 @@ class Command(BaseCommand):
                 t = datetime.strptime(normalized, "%H:%M").time()
                 result["race_time_hhmm"] = t.hour * 100 + t.minute
             except Exception:
-                m2 = re.search(r"\b(\d{3,4})\b", raw)
+                m2 = _HHMM_RE.search(raw)
                 if m2:
                     try:
                         result["race_time_hhmm"] = int(m2.group(1))
@@ -318,15 +451,15 @@ class Command(BaseCommand):
 
         b2 = right_td.find("div", class_="b2")
         if b2:
-            b2_lines = list(b2.stripped_strings)
+            b2_lines = _lines(b2)
             if b2_lines:
                 result["race_name"] = b2_lines[0]
             if len(b2_lines) > 1:
-                m = re.search(r"(\d+)\s*Metres", b2_lines[1], flags=re.I)
+                m = _METRES_RE.search(b2_lines[1])
                 if m:
                     result["race_distance"] = m.group(1)
 
-        for text in (t.strip() for t in right_td.stripped_strings if t.strip()):
+        for text in _lines(right_td):
             low = text.lower()
             if any(k in low for k in (
                 "class", "maiden", "merit rated", "benchmark", "handicap",
@@ -334,11 +467,11 @@ class Command(BaseCommand):
                 "novice", "graduation", "restricted"
             )):
                 result["race_class"] = text
-                m = re.search(r"Merit\s*Rated\s*(\d{1,3})", text, flags=re.I)
+                m = _MERIT_RE.search(text)
                 if not m:
-                    m = re.search(r"Benchmark\s*(\d{1,3})", text, flags=re.I)
+                    m = _BENCHMARK_RE.search(text)
                 if not m:
-                    m = re.search(r"\b(\d{2,3})\b", text)
+                    m = _TWO_THREE_DIGITS_RE.search(text)
                 if m:
                     try:
                         result["race_merit"] = int(m.group(1))
@@ -351,8 +484,13 @@ class Command(BaseCommand):
         return result
 
     def _parse_horse_runs(self, horse_table, horse_obj):
-        """Extract and save the last 4 runs for a horse"""
+        """
+        Extract the last 4 runs for a horse.
+        Returns (runs, run_objs): display dicts and unsaved Run instances
+        for the caller to bulk insert.
+        """
         runs = []
+        run_objs = []
         
         # Find all run rows - looking for class="small" in your HTML
         run_rows = horse_table.find_all('tr', class_='small') or []
@@ -379,15 +517,15 @@ class Command(BaseCommand):
                 # Extract race class (from column 5 in debug output)
                 race_class = cols[4] if len(cols) > 4 else ""
                 
-                # Create the run record
-                Run.objects.create(
+                # Build the run record (saved in bulk by _parse_horses)
+                run_objs.append(Run(
                     horse=horse_obj,
                     run_date=run_date,
                     position=position,
                     margin=margin,
                     distance=distance,
                     race_class=race_class
-                )
+                ))
                 runs.append({
                     'date': run_date,
                     'position': position,
@@ -400,39 +538,59 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.WARNING(f"⚠️ Could not parse run row: {e}"))
                 continue
                 
-        return runs
+        return runs, run_objs
 
     # -------------------------
     # Horse parsing
     # -------------------------
+    @transaction.atomic
     def _parse_horses(self, soup, race, update_existing: bool):
         """
         Parse horse blocks. We only consider tables that:
         - have border="border"
         - contain a <div class="b4"> with a numeric horse number
+        The whole card is saved in a single transaction.
         """
         self.stdout.write("\n🔍 Extracting Horses...")
         created_or_updated = 0
+        all_runs = []
         horse_tables = soup.select('table[border="border"]')
         self.stdout.write(f"Found {len(horse_tables)} horse tables")
         
-        # FIRST: Find and parse the jockey-trainer stats table
-        jt_analysis_data = self._parse_jockey_trainer_table(soup)
+        # FIRST: Find and parse the jockey-trainer stats table (or reuse the
+        # result from a previous import of the same file)
+        jt_analysis_data = None if self.rebuild_jt else self._load_jt_cache()
+        if jt_analysis_data is None:
+            jt_analysis_data = self._parse_jockey_trainer_table(soup)
+            self._save_jt_cache(jt_analysis_data)
+        else:
+            self.stdout.write(f"♻️ Loaded J-T data from cache ({len(jt_analysis_data)} horses)")
         self.stdout.write(f"J-T analysis data keys: {list(jt_analysis_data.keys())}")
         
         # Store in class cache for later use in score calculation
         self.jt_analysis_cache = jt_analysis_data
         self.stdout.write(f"✅ Stored J-T data in class cache: {len(self.jt_analysis_cache)} horses")
+
+        # Prefetch this race's horses once; new/changed rows are written in bulk after the loop
+        existing = {h.horse_no: h for h in Horse.objects.filter(race=race).only('id', 'horse_no')}
+        to_create = {}
+        to_update = {}
+
+        # Loop invariants
+        race_class_default = race.race_class or ""
+        jt_data_get = jt_analysis_data.get
         
         for idx, table in enumerate(horse_tables, start=1):
             try:
                 first_tr = table.find("tr")
                 if not first_tr:
-                    self.stdout.write(f"Skipping table {idx}: No rows found")
+                    if self.verbosity >= 2:
+                        self.stdout.write(f"Skipping table {idx}: No rows found")
                     continue
                 main_tds = first_tr.find_all("td", recursive=False)
                 if len(main_tds) < 2:
-                    self.stdout.write(f"Skipping table {idx}: Not enough main TDs ({len(main_tds)})")
+                    if self.verbosity >= 2:
+                        self.stdout.write(f"Skipping table {idx}: Not enough main TDs ({len(main_tds)})")
                     continue
 
                 # --- TD 0: number/odds/rating ---
@@ -440,22 +598,25 @@ class Command(BaseCommand):
                 num_div = td0.find("div", class_="b4")
                 if not num_div:
                     # Not a horse row
-                    self.stdout.write(f"Skipping table {idx}: No b4 div found")
+                    if self.verbosity >= 2:
+                        self.stdout.write(f"Skipping table {idx}: No b4 div found")
                     continue
                 try:
-                    horse_no = int(_text(num_div))
-                    self.stdout.write(f"Processing horse {horse_no}...")
+                    horse_no = int(num_div.get_text(strip=True))
+                    if self.verbosity >= 2:
+                        self.stdout.write(f"Processing horse {horse_no}...")
                 except Exception as e:
-                    self.stdout.write(f"Skipping table {idx}: Could not parse horse number: {e}")
+                    if self.verbosity >= 2:
+                        self.stdout.write(f"Skipping table {idx}: Could not parse horse number: {e}")
                     continue
 
                 odds_el = td0.find("div", class_="b1")
-                odds = _text(odds_el)
+                odds = odds_el.get_text(strip=True) if odds_el else ""
 
                 merit_el = td0.find("span", class_="b1")
                 horse_merit = None
                 if merit_el:
-                    m = re.search(r"\d+", merit_el.get_text())
+                    m = _DIGITS_RE.search(merit_el.get_text())
                     if m:
                         horse_merit = int(m.group())
 
@@ -466,24 +627,26 @@ class Command(BaseCommand):
                 age = ""
 
                 if td1:
+                    # Walk the name block's text once and derive everything from it
+                    td1_lines = _lines(td1)
                     name_cell = td1.find("td", class_="b1")
-                    horse_name = _text(name_cell) or _text(td1)
+                    horse_name = (name_cell.get_text(strip=True) if name_cell else "") or "".join(td1_lines)
                     # Blinkers if "(B)" appears anywhere in the name block
-                    block_text_upper = td1.get_text(" ", strip=True).upper()
+                    block_text_upper = " ".join(td1_lines).upper()
                     blinkers = "(B" in block_text_upper
 
                     # Age e.g. "6 y. o. b g."
                     age_text = ""
-                    for s in td1.stripped_strings:
-                        if re.search(r"\by\.?\s*o\.?", s, flags=re.I):
+                    for s in td1_lines:
+                        if _AGE_RE.search(s):
                             age_text = s
                             break
-                    m_age = re.search(r"\b(\d{1,2})\b", age_text)
+                    m_age = _AGE_NUM_RE.search(age_text)
                     age = m_age.group(1) if m_age else ""
 
                 # --- Jockey / Trainer (nested table) ---
                 # Look inside the current horse's table for any "div.itbld"
-                itbld_divs = table.select("div.itbld")
+                itbld_divs = table.find_all("div", class_="itbld")
                 jockey, trainer = "", ""
                 if len(itbld_divs) >= 1:
                     jockey = " ".join(itbld_divs[0].stripped_strings)
@@ -494,29 +657,32 @@ class Command(BaseCommand):
                 jt_score = 50  # Default neutral score
                 jt_rating = "Average"
                 
-                self.stdout.write(f"Looking for J-T data for horse {horse_no}...")
-                self.stdout.write(f"Available J-T keys: {list(jt_analysis_data.keys())}")
+                if self.verbosity >= 2:
+                    self.stdout.write(f"Looking for J-T data for horse {horse_no}...")
+                    self.stdout.write(f"Available J-T keys: {list(jt_analysis_data.keys())}")
                 
                 # Use the pre-parsed jockey-trainer data if available
-                if horse_no in jt_analysis_data:
-                    jt_data = jt_analysis_data[horse_no]
-                    jt_score = jt_data['score']
-                    jt_rating = jt_data['rating']
-                    # Use the jockey/trainer from analysis if available (more accurate)
-                    jockey = jt_data.get('jockey', jockey)
-                    trainer = jt_data.get('trainer', trainer)
-                    self.stdout.write(f"✅ Found J-T data for horse {horse_no}: Score={jt_score}")
-                else:
+                jt_data = jt_data_get(horse_no)
+                if jt_data is not None:
+                    jt_score = jt_data.score
+                    jt_rating = jt_data.rating
+                    # Use the jockey/trainer from analysis (more accurate)
+                    jockey = jt_data.jockey
+                    trainer = jt_data.trainer
+                    if self.verbosity >= 2:
+                        self.stdout.write(f"✅ Found J-T data for horse {horse_no}: Score={jt_score}")
+                elif self.verbosity >= 2:
                     self.stdout.write(f"❌ No J-T data found for horse {horse_no}, using default score 50")
                     self.stdout.write(f"Available horse numbers in J-T data: {list(jt_analysis_data.keys())}")
 
                 # --- Debug prints ---
-                self.stdout.write(f"[DEBUG] Horse {horse_no}: name={horse_name}")
-                self.stdout.write(f"[DEBUG]  -> Odds={odds}, Merit={horse_merit}, Blinkers={blinkers}, Age={age}")
-                self.stdout.write(f"[DEBUG]  -> Jockey={jockey}, Trainer={trainer}")
-                self.stdout.write(f"[DEBUG]  -> Jockey-Trainer Score={jt_score}, Rating={jt_rating}")
+                logger.debug("Horse %s: name=%s", horse_no, horse_name)
+                logger.debug(" -> Odds=%s, Merit=%s, Blinkers=%s, Age=%s", odds, horse_merit, blinkers, age)
+                logger.debug(" -> Jockey=%s, Trainer=%s", jockey, trainer)
+                logger.debug(" -> Jockey-Trainer Score=%s, Rating=%s", jt_score, jt_rating)
 
-                self.stdout.write(f"🐎 FINAL JT SCORE FOR HORSE {horse_no}: {jt_score}")
+                if self.verbosity >= 2:
+                    self.stdout.write(f"🐎 FINAL JT SCORE FOR HORSE {horse_no}: {jt_score}")
 
                 # Ensure safe field lengths
                 age = (age or "")[:10]
@@ -530,41 +696,119 @@ class Command(BaseCommand):
                     dob="",  # not present in provided markup
                     odds=odds,
                     horse_merit=horse_merit if horse_merit is not None else 0,
-                    race_class=race.race_class or "",
+                    race_class=race_class_default,
                     trainer=trainer,
                     jockey=jockey,
                     jt_score=jt_score,        # ADD THIS
                     jt_rating=jt_rating,      # ADD THIS
                 )
-                obj, created = Horse.objects.update_or_create(
-                    race=race, horse_no=horse_no, defaults=defaults
-                )
+                obj = to_create.get(horse_no) or existing.get(horse_no)
+                if obj is None:
+                    obj = Horse(race=race, horse_no=horse_no)
+                    to_create[horse_no] = obj
+                elif obj.pk is not None:
+                    to_update[horse_no] = obj
+                for field, value in defaults.items():
+                    setattr(obj, field, value)
                 created_or_updated += 1
-                self.stdout.write(
-                    f"🐎 Horse {horse_no}: {horse_name} | "
-                    f"Blinkers={blinkers} | Odds={odds or '-'} | "
-                    f"Merit={defaults['horse_merit']} | "
-                    f"Jockey={jockey or '-'} | Trainer={trainer or '-'} | "
-                    f"J-T Score={jt_score} | J-T Rating={jt_rating}"
-                )
+                if self.verbosity >= 2:
+                    self.stdout.write(
+                        f"🐎 Horse {horse_no}: {horse_name} | "
+                        f"Blinkers={blinkers} | Odds={odds or '-'} | "
+                        f"Merit={defaults['horse_merit']} | "
+                        f"Jockey={jockey or '-'} | Trainer={trainer or '-'} | "
+                        f"J-T Score={jt_score} | J-T Rating={jt_rating}"
+                    )
 
                 # Add runs extraction
-                runs = self._parse_horse_runs(table, obj)
-                if runs:
+                runs, run_objs = self._parse_horse_runs(table, obj)
+                all_runs.extend(run_objs)
+                if runs and self.verbosity >= 2:
                     self.stdout.write(f"    📜 Added {len(runs)} past runs:")
                     for run in runs:
                         self.stdout.write(f"      - {run['date']}: Pos {run['position']} ({run['margin']}) {run['distance']}m {run['class']}")
 
             except Exception as e:
                 self.stdout.write(self.style.WARNING(f"⚠️ Skipping one table (idx {idx}) due to error: {e}"))
-                import traceback
-                self.stdout.write(traceback.format_exc())
+                logger.debug("Traceback for horse table %s", idx, exc_info=True)
+
+        # Horses first so the pending Run rows can pick up their primary keys,
+        # then one multi-row INSERT for every run on the card; existing
+        # (horse, run_date) rows are left alone.
+        if to_create:
+            Horse.objects.bulk_create(list(to_create.values()), batch_size=200)
+        if to_update:
+            Horse.objects.bulk_update(list(to_update.values()), fields=self.HORSE_FIELDS, batch_size=200)
+        runs_saved = self._save_runs(all_runs) if all_runs else 0
+        self.stdout.write(f"🐎 Inserted {len(to_create)} / updated {len(to_update)} horses")
+        if all_runs:
+            self.stdout.write(f"📜 Saved {runs_saved} past runs")
 
         self.stdout.write(self.style.SUCCESS(f"✅ Horses saved: {created_or_updated}"))
         return created_or_updated
 
     
     
+    def _save_runs(self, all_runs):
+        """
+        Insert the card's past runs in one statement; existing (horse, run_date)
+        rows are left alone. ignore_conflicts only covers that unique key, so
+        if a bad value fails the INSERT, retry run by run and skip the bad
+        ones. Returns the number of runs handed to the database.
+        """
+        try:
+            # Savepoint, so a failed INSERT doesn't roll back the race's horses
+            with transaction.atomic():
+                Run.objects.bulk_create(all_runs, batch_size=500, ignore_conflicts=True)
+            return len(all_runs)
+        except Exception as e:
+            self.stdout.write(self.style.WARNING(f"⚠️ Bulk run insert failed, saving one by one: {e}"))
+        
+        saved = 0
+        for run in all_runs:
+            try:
+                with transaction.atomic():
+                    run.save()
+                saved += 1
+            except Exception as e:
+                # Already stored for this horse and date: skipped, as bulk_create would
+                if isinstance(e, IntegrityError) and Run.objects.filter(
+                    horse_id=run.horse_id, run_date=run.run_date
+                ).exists():
+                    continue
+                self.stdout.write(self.style.WARNING(f"⚠️ Could not save run {run.run_date}: {e}"))
+        return saved
+
+    def _jt_cache_path(self):
+        if not self.html_digest:
+            return None
+        return os.path.join(JT_CACHE_DIR, f"{self.html_digest}.json")
+
+    def _load_jt_cache(self):
+        """Return cached J-T data for the current HTML file, or None."""
+        path = self._jt_cache_path()
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                raw = json.load(fh)
+            return {int(horse_no): JTResult(*fields) for horse_no, fields in raw.items()}
+        except (OSError, ValueError, TypeError) as e:
+            self.stdout.write(self.style.WARNING(f"⚠️ Ignoring unreadable J-T cache {path}: {e}"))
+            return None
+
+    def _save_jt_cache(self, jt_analysis_data):
+        """Persist parsed J-T data keyed by the HTML file's hash."""
+        path = self._jt_cache_path()
+        if not path or not jt_analysis_data:
+            return
+        try:
+            os.makedirs(JT_CACHE_DIR, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as fh:
+                json.dump(jt_analysis_data, fh)
+        except OSError as e:
+            self.stdout.write(self.style.WARNING(f"⚠️ Could not write J-T cache {path}: {e}"))
+
     def _parse_jockey_trainer_table(self, soup):
         """Find and parse the jockey-trainer statistics table"""
         jt_analysis_data = {}
@@ -578,90 +822,81 @@ class Command(BaseCommand):
             if not first_row:
                 continue
                 
-            cells = first_row.find_all(['td', 'th'])
-            cell_texts = [cell.get_text(strip=True) for cell in cells]
-            
-            self.stdout.write(f"Table {i}: First row cells: {cell_texts}")
-            
-            # Check if this looks like a J-T table
-            has_jockey = any('jockey' in text.lower() for text in cell_texts)
-            has_trainer = any('trainer' in text.lower() for text in cell_texts)
-            has_rns = any('rns' in text.lower() for text in cell_texts)
+            # Cheap reject: a J-T table names both jockey and trainer in its
+            # first row (the "Trainer/Jockey Combinations" banner or the header)
+            first_row_text = first_row.get_text(" ", strip=True).lower()
+            if 'jockey' not in first_row_text or 'trainer' not in first_row_text:
+                continue
             
-            if has_jockey and has_trainer:
+            if self.verbosity >= 2:
                 self.stdout.write(f"🎯 FOUND POTENTIAL J-T TABLE {i}!")
                 self.stdout.write("Let me examine this table more closely...")
+            
+            # Examine all rows in this table
+            for j, row in enumerate(table.find_all('tr')):
+                row_cells = row.find_all('td')
+                row_texts = [cell.get_text(strip=True) for cell in row_cells]
                 
-                # Examine all rows in this table
-                for j, row in enumerate(table.find_all('tr')):
-                    row_cells = row.find_all('td')
-                    row_texts = [cell.get_text(strip=True) for cell in row_cells]
+                if len(row_texts) < 5:  # Skip short rows
+                    continue
                     
-                    if len(row_texts) < 5:  # Skip short rows
-                        continue
-                        
-                    # Skip header rows
-                    if any(text.lower() in ['jockey', 'trainer', 'rns', 'no'] for text in row_texts):
+                # Skip header rows
+                if not _JT_HEADER_WORDS.isdisjoint(text.lower() for text in row_texts):
+                    if self.verbosity >= 2:
                         self.stdout.write(f"  📋 Header row: {row_texts}")
-                        continue
-                    
+                    continue
+                
+                if self.verbosity >= 2:
                     self.stdout.write(f"  📊 Row {j}: {row_texts}")
-                    
-                    # Parse the J-T data - you'll need to implement this method
-                    jt_results = self._analyze_jockey_trainer_combination(row)
-                    
-                    for result in jt_results:
-                        try:
-                            horse_no = int(result['horse_number'])
-                            jt_analysis_data[horse_no] = {
-                                'score': result['score'],
-                                'rating': result['rating'],
-                                'jockey': result['jockey'],
-                                'trainer': result['trainer']
-                            }
-                            self.stdout.write(f"  🎯 Horse {horse_no}: J-T Score={result['score']}, Jockey={result['jockey']}, Trainer={result['trainer']}")
-                        except (ValueError, KeyError) as e:
-                            self.stdout.write(f"  ❌ Could not parse J-T result: {e}")
-                            continue
                 
-                if jt_analysis_data:
-                    self.stdout.write(f"✅ Successfully parsed J-T data from table {i}")
-                    break
-                else:
-                    self.stdout.write(f"❌ No J-T data parsed from table {i}")
-        
+                # Parse the J-T data - you'll need to implement this method
+                jt_results = self._analyze_jockey_trainer_combination(row_texts)
+                
+                for result in jt_results:
+                    try:
+                        horse_no = int(result.horse_number)
+                        jt_analysis_data[horse_no] = result
+                        if self.verbosity >= 2:
+                            self.stdout.write(f"  🎯 Horse {horse_no}: J-T Score={result.score}, Jockey={result.jockey}, Trainer={result.trainer}")
+                    except ValueError as e:
+                        self.stdout.write(f"  ❌ Could not parse J-T result: {e}")
+                        continue
+            
+            if jt_analysis_data:
+                self.stdout.write(f"✅ Successfully parsed J-T data from table {i}")
+                break
+            else:
+                self.stdout.write(f"❌ No J-T data parsed from table {i}")
+    
         if not jt_analysis_data:
             self.stdout.write("❌ CRITICAL: No J-T table found or no data parsed!")
             self.stdout.write("Please check if the HTML contains a jockey-trainer stats table")
             self.stdout.write("The table should have columns: HorseNo, Trainer, Jockey, Rns, 1st, 2nd, 3rd, Win%, PLC%")
         else:
             self.stdout.write(f"✅ SUCCESS: Parsed J-T data for {len(jt_analysis_data)} horses: {list(jt_analysis_data.keys())}")
-            for horse_no, data in jt_analysis_data.items():
-                self.stdout.write(f"   Horse {horse_no}: Score={data['score']}, Jockey={data['jockey']}, Trainer={data['trainer']}")
+            if self.verbosity >= 2:
+                for horse_no, data in jt_analysis_data.items():
+                    self.stdout.write(f"   Horse {horse_no}: Score={data.score}, Jockey={data.jockey}, Trainer={data.trainer}")
         
         return jt_analysis_data
 
 
 
 
-    def _analyze_jockey_trainer_combination(self, row):
+    def _analyze_jockey_trainer_combination(self, cell_texts):
         """
-        Analyze jockey-trainer combination from a table row
+        Analyze jockey-trainer combination from a table row's cell texts
+        (already extracted by the caller).
         Returns a list of results (usually one result per row)
         """
         results = []
         
         try:
-            cells = row.find_all('td')
-            if len(cells) < 8:  # Need enough columns for proper analysis
+            if len(cell_texts) < 8:  # Need enough columns for proper analysis
                 return results
             
             # Extract data from cells - adjust these indices based on your table structure
-            horse_no = cells[0].get_text(strip=True)
-            trainer = cells[1].get_text(strip=True)
-            jockey = cells[2].get_text(strip=True)
-            runs = cells[3].get_text(strip=True)
-            wins = cells[4].get_text(strip=True)
+            horse_no, trainer, jockey, runs, wins = cell_texts[:5]
             
             # Calculate score based on win percentage
             try:
@@ -673,37 +908,13 @@ class Command(BaseCommand):
                 score = min(100, win_percentage * 2)  # Scale appropriately
                 
                 # Determine rating
-                if score >= 80:
-                    rating = "Excellent"
-                elif score >= 60:
-                    rating = "Very Good"
-                elif score >= 40:
-                    rating = "Good"
-                elif score >= 20:
-                    rating = "Average"
-                else:
-                    rating = "Poor"
+                rating = self.get_jt_rating(score)
                     
-                results.append({
-                    'horse_number': horse_no,
-                    'jockey': jockey,
-                    'trainer': trainer,
-                    'runs': runs_int,
-                    'wins': wins_int,
-                    'win_percentage': win_percentage,
-                    'score': round(score),
-                    'rating': rating
-                })
+                results.append(JTResult(horse_no, jockey, trainer, round(score), rating))
                 
             except (ValueError, ZeroDivisionError):
                 # If parsing numbers fails, use default score
-                results.append({
-                    'horse_number': horse_no,
-                    'jockey': jockey,
-                    'trainer': trainer,
-                    'score': 50,
-                    'rating': "Average"
-                })
+                results.append(JTResult(horse_no, jockey, trainer, 50, "Average"))
                 
         except Exception as e:
             self.stdout.write(f"❌ Error analyzing J-T combination: {e}")
@@ -716,22 +927,47 @@ class Command(BaseCommand):
 
 
 
+    def _bulk_load_runs(self, horses):
+        """
+        Fetch past runs for all the given horses in one query.
+        Returns {horse_id: [Run, ...]} with each list newest first.
+        """
+        runs_by_horse = defaultdict(list)
+        runs = (
+            Run.objects.filter(horse__in=horses)
+            .only('horse_id', 'run_date', 'position', 'track', 'distance')
+            .order_by('-run_date')
+        )
+        for run in runs:
+            runs_by_horse[run.horse_id].append(run)
+        return runs_by_horse
+
     # In your run analyzer class
-    def analyze_horse_runs(self, horse):
+    def analyze_horse_runs(self, horse, runs=None):
         """
-        Analyze all runs for a specific horse
+        Analyze all runs for a specific horse.
+        If `runs` (newest first) were prefetched by _bulk_load_runs the
+        analysis is computed in Python without touching the DB.
         """
         # Ensure we have a Horse instance with an ID
         if not hasattr(horse, 'id') or not horse.id:
-            self.stdout.write(f"DEBUG: Invalid horse object received: {horse}")
+            logger.debug("analyze_horse_runs: invalid horse object received: %s", horse)
             return None
+
+        if runs is not None:
+            return self._analyze_prefetched_runs(runs)
         
         try:
-            # Get all runs for this horse by name (since runs might not be linked by FK)
-            runs = Run.objects.filter(horse_name=horse.horse_name).order_by('-date')
+            # One materialised query; count, average and the last five starts
+            # are all derived from this list instead of separate round trips.
+            runs = list(
+                Run.objects.filter(horse=horse)
+                .only('horse_id', 'run_date', 'position', 'track', 'distance')
+                .order_by('-run_date')
+            )
             
-            if not runs.exists():
-                self.stdout.write(f"DEBUG: No runs found for horse: {horse.horse_name}")
+            if not runs:
+                logger.debug("No runs found for horse: %s", horse.horse_name)
                 return {
                     'total_runs': 0,
                     'recent_form': [],
@@ -743,29 +979,39 @@ class Command(BaseCommand):
                     'place_percentage': 0
                 }
             
-            # Perform analysis on the runs
-            analysis = {
-                'total_runs': runs.count(),
-                'recent_form': [run.finish_position for run in runs[:5] if run.finish_position],
-                'avg_finish_position': runs.aggregate(avg=models.Avg('finish_position'))['avg__avg'],
-                'last_5_starts': [{
-                    'date': run.date,
-                    'position': run.finish_position,
-                    'track': run.track,
-                    'distance': run.distance
-                } for run in runs[:5]],
-                # Add more analysis as needed
-            }
-            
-            return analysis
+            return self._analyze_prefetched_runs(runs)
             
         except Exception as e:
-            self.stdout.write(f"DEBUG: Error in analyze_horse_runs: {str(e)}")
+            logger.debug("Error in analyze_horse_runs: %s", e)
             return None
 
 
 
     
+    def _analyze_prefetched_runs(self, runs):
+        """Run analysis over an in-memory list of Run rows (newest first)."""
+        positions = [p for p in (_position_int(run.position) for run in runs) if p]
+        recent = runs[:5]
+        avg_position = statistics.mean(positions) if positions else None
+        return {
+            'total_runs': len(runs),
+            'runs_analyzed': len(runs),
+            'recent_form': [p for p in (_position_int(run.position) for run in recent) if p],
+            'avg_finish_position': avg_position,
+            'average_position': avg_position,
+            'last_5_starts': [{
+                'date': run.run_date,
+                'position': run.position,
+                'track': run.track,
+                'distance': run.distance
+            } for run in recent],
+            'best_finish': min(positions) if positions else None,
+            'form_rating': _form_rating(positions),
+            'consistency': _consistency(positions),
+            'win_percentage': 0,
+            'place_percentage': 0
+        }
+
     def calculate_form_score(self, run_analysis):
         """
         Calculate form score based on run analysis
@@ -779,19 +1025,11 @@ class Command(BaseCommand):
             if avg_position is None:
                 return 50
                 
-            # Convert average position to score (1st = 100, 10th = 0)
-            form_score = max(0, 100 - (avg_position * 10))
-            
-            # Adjust based on form rating (lower form_rating is better)
-            form_rating = run_analysis.get('form_rating', 0)
-            if form_rating > 0:
-                form_score = form_score * (1 - (form_rating / 100))
-            
-            # Adjust based on consistency
-            consistency = run_analysis.get('consistency', 0)
-            form_score = form_score * (consistency / 100)
-            
-            return min(100, max(0, form_score))
+            return _form_score_core(
+                avg_position,
+                run_analysis.get('form_rating', 0),
+                run_analysis.get('consistency', 0),
+            )
             
         except Exception as e:
             print(f"ERROR calculating form score: {e}")
@@ -810,10 +1048,7 @@ class Command(BaseCommand):
             if avg_position is None:
                 return 50
                 
-            # Better positions = higher speed rating
-            speed_rating = max(0, 100 - (avg_position * 8))
-            
-            return min(100, max(0, speed_rating))
+            return _speed_score_core(avg_position)
             
         except Exception as e:
             print(f"ERROR calculating speed rating: {e}")
@@ -835,10 +1070,7 @@ class Command(BaseCommand):
                 return 50
                 
             # Higher class weight = better class = higher score
-            # Assuming class weights are 0-100 where higher is better
-            class_score = avg_class
-            
-            return min(100, max(0, class_score))
+            return _class_score_core(avg_class)
             
         except Exception as e:
             print(f"ERROR calculating class score: {e}")
@@ -858,16 +1090,9 @@ class Command(BaseCommand):
             # Simple implementation: return fixed score based on jockey "quality"
             # You should replace this with actual jockey performance data
             
-            jockey_name_lower = jockey_name.lower()
-            
             # Example: give higher scores to jockeys with certain names
             # This is just a placeholder - use actual jockey statistics
-            if any(name in jockey_name_lower for name in ['smith', 'jones', 'brown']):
-                return 75
-            elif any(name in jockey_name_lower for name in ['wilson', 'taylor', 'davis']):
-                return 65
-            else:
-                return 55
+            return _name_tier_score(jockey_name, _JOCKEY_TIER1, _JOCKEY_TIER2)
                 
         except Exception as e:
             print(f"ERROR calculating jockey score: {e}")
@@ -883,15 +1108,8 @@ class Command(BaseCommand):
             
         try:
             # Placeholder - implement proper trainer rating system
-            trainer_name_lower = trainer_name.lower()
-            
             # Give higher scores to more successful/experienced trainers
-            if any(name in trainer_name_lower for name in ['bass', 'smith', 'jones', 'brown', 'master']):
-                return 75
-            elif any(name in trainer_name_lower for name in ['wilson', 'taylor', 'davis', 'murray', 'coach']):
-                return 65
-            else:
-                return 55
+            return _name_tier_score(trainer_name, _TRAINER_TIER1, _TRAINER_TIER2)
                 
         except Exception as e:
             self.stdout.write(f"ERROR calculating trainer score for {trainer_name}: {e}")
@@ -908,23 +1126,14 @@ class Command(BaseCommand):
         try:
             # Convert weight to numeric if it's a string
             if isinstance(weight, str):
-                # Remove non-numeric characters
-                weight_value = float(''.join(filter(str.isdigit, weight)))
+                # First run of digits ("58kg" -> 58)
+                weight_value = float(_DIGITS_RE.search(weight).group())
             else:
                 weight_value = float(weight)
                 
             # Lower weight = better score (typically)
-            # Adjust this formula based on your specific requirements
-            if weight_value < 52:
-                return 80  # Very light weight
-            elif weight_value < 55:
-                return 70  # Light weight
-            elif weight_value < 58:
-                return 60  # Medium weight
-            elif weight_value < 61:
-                return 50  # Average weight
-            else:
-                return 40  # Heavy weight
+            # <52 very light, <55 light, <58 medium, <61 average, else heavy
+            return _WEIGHT_SCORES[bisect_right(_WEIGHT_THRESHOLDS, weight_value)]
                 
         except Exception as e:
             print(f"ERROR calculating weight score: {e}")
@@ -933,21 +1142,23 @@ class Command(BaseCommand):
     # ... rest of your existing code ...
   
 
-    def calculate_horse_score(self, horse):
+    def calculate_horse_score(self, horse, runs=None):
         """
-        Calculate score for a single horse - using correct field names
+        Calculate score for a single horse - using correct field names.
+        `runs` are the horse's prefetched Run rows (see rank_horses).
+        Returns the HorseScore field values; nothing is written here.
         """
         try:
             # DEBUG: Check what we're receiving
-            self.stdout.write(f"DEBUG: calculate_horse_score received {type(horse)}: {horse}")
+            logger.debug("calculate_horse_score received %s: %s", type(horse), horse)
             
             # If horse is a string, try to find the Horse instance
             if isinstance(horse, str):
-                self.stdout.write(f"DEBUG: Looking up horse by name: {horse}")
+                logger.debug("Looking up horse by name: %s", horse)
                 try:
                     horse_instance = Horse.objects.get(horse_name=horse)
                     horse = horse_instance
-                    self.stdout.write(f"DEBUG: Found horse instance: {horse}")
+                    logger.debug("Found horse instance: %s", horse)
                 except Horse.DoesNotExist:
                     self.stdout.write(self.style.ERROR(f"    ❌ Horse not found: {horse}"))
                     return None
@@ -955,12 +1166,15 @@ class Command(BaseCommand):
                     self.stdout.write(self.style.WARNING(f"    ⚠️ Multiple horses found with name: {horse}"))
                     horse_instance = Horse.objects.filter(horse_name=horse).first()
                     horse = horse_instance
-                    self.stdout.write(f"DEBUG: Using first match: {horse}")
+                    logger.debug("Using first match: %s", horse)
             
-            self.stdout.write(f"    🏇 Calculating score for {horse.horse_name}...")
+            logger.debug("Calculating score for %s...", horse.horse_name)
             
             # Get run analysis
-            run_analysis = self.run_analyzer.analyze_horse_runs(horse)
+            if runs is not None:
+                run_analysis = self.analyze_horse_runs(horse, runs)
+            else:
+                run_analysis = self.run_analyzer.analyze_horse_runs(horse)
             
             if not run_analysis:
                 self.stdout.write(f"    ⚠️ No run analysis available for {horse.horse_name}")
@@ -992,49 +1206,37 @@ class Command(BaseCommand):
             recovery_score = 50  # You might want to calculate this
             
             # Calculate overall score (adjust weights as needed)
-            overall_score = (
-                form_score * 0.2 +
-                class_score * 0.15 +
-                consistency_score * 0.1 +
-                speed_rating * 0.1 +
-                jockey_score * 0.1 +
-                trainer_score * 0.05 +
-                merit_score * 0.1 +
-                distance_score * 0.05 +
-                stamina_index * 0.05 +
-                track_affinity * 0.05 +
-                recovery_score * 0.05
-            )
+            overall_score = _overall_score((
+                form_score, class_score, consistency_score, speed_rating,
+                jockey_score, trainer_score, merit_score, distance_score,
+                stamina_index, track_affinity, recovery_score,
+            ))
             
-            # Create or update HorseScore with CORRECT field names
-            horse_score, created = HorseScore.objects.update_or_create(
-                horse=horse,
-                race=horse.race,
-                defaults={
-                    'overall_score': overall_score,
-                    'merit_score': merit_score,
-                    'form_score': form_score,
-                    'class_score': class_score,
-                    'distance_score': distance_score,
-                    'consistency_score': consistency_score,
-                    'speed_rating': speed_rating,  # Correct field name
-                    'stamina_index': stamina_index,
-                    'track_affinity': track_affinity,
-                    'jockey_score': jockey_score,
-                    'trainer_score': trainer_score,
-                    'days_since_last_run': days_since_last_run,
-                    'recovery_score': recovery_score,
-                    'calculated_at': timezone.now()
-                }
-            )
+            # HorseScore values with CORRECT field names; rank_horses writes
+            # them for the whole race in one batch
+            score_fields = {
+                'overall_score': overall_score,
+                'merit_score': merit_score,
+                'form_score': form_score,
+                'class_score': class_score,
+                'distance_score': distance_score,
+                'consistency_score': consistency_score,
+                'speed_rating': speed_rating,  # Correct field name
+                'stamina_index': stamina_index,
+                'track_affinity': track_affinity,
+                'jockey_score': jockey_score,
+                'trainer_score': trainer_score,
+                'days_since_last_run': days_since_last_run,
+                'recovery_score': recovery_score,
+                'calculated_at': timezone.now()
+            }
             
-            self.stdout.write(f"    ✅ Score calculated: {overall_score:.2f}")
-            return horse_score
+            logger.debug("Score calculated for %s: %.2f", horse.horse_name, overall_score)
+            return score_fields
             
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"    ❌ Error calculating score for {horse}: {str(e)}"))
-            import traceback
-            self.stdout.write(self.style.ERROR(f"    Traceback: {traceback.format_exc()}"))
+            logger.debug("Traceback for %s", horse, exc_info=True)
             return None
 
 
@@ -1047,28 +1249,38 @@ class Command(BaseCommand):
         """
         ranked_horses = []
         
-        # Get all horses in this race
-        horses = Horse.objects.filter(race=race)
+        # Get all horses in this race and every past run for them in one query
+        # Only the columns scoring and the ranking table read
+        horses = list(
+            Horse.objects.filter(race=race)
+            .select_related('race')
+            .only('id', 'race', 'horse_no', 'horse_name', 'jockey', 'trainer', 'horse_merit')
+        )
+        runs_by_horse = self._bulk_load_runs(horses)
         
+        scores_by_horse = {}
         for horse in horses:
-            horse_score = self.calculate_horse_score(horse)
+            horse_score = self.calculate_horse_score(horse, runs_by_horse.get(horse.id, []))
             if horse_score:
+                scores_by_horse[horse.id] = horse_score
                 # Get the actual scores for each category
                 ranked_horses.append({
                     'horse': horse,
-                    'score': horse_score.overall_score,
+                    'score': horse_score['overall_score'],
                     'merit_score': getattr(horse, 'horse_merit', 0) or 0,
-                    'class_score': horse_score.class_score,
-                    'form_score': horse_score.form_score,
-                    'jt_score': horse_score.jockey_score + (getattr(horse_score, 'trainer_score', 0) or 0),
+                    'class_score': horse_score['class_score'],
+                    'form_score': horse_score['form_score'],
+                    'jt_score': horse_score['jockey_score'] + (horse_score.get('trainer_score', 0) or 0),
                     'rank': 0,  # Will be set after sorting
                     'jockey': getattr(horse, 'jockey', ''),
                     'trainer': getattr(horse, 'trainer', ''),
                     'class_trend': "stable"
                 })
         
+        self._save_horse_scores(race, scores_by_horse)
+        
         # Sort by overall score (descending)
-        ranked_horses.sort(key=lambda x: x['score'], reverse=True)
+        ranked_horses.sort(key=itemgetter('score'), reverse=True)
         
         # Set actual ranks
         for i, horse_data in enumerate(ranked_horses, 1):
@@ -1083,94 +1295,164 @@ class Command(BaseCommand):
         return ranked_horses
 
 
+    def _save_horse_scores(self, race, scores_by_horse):
+        """
+        Write HorseScore rows for a race in bulk.
+        `scores_by_horse` maps horse_id -> field values from calculate_horse_score.
+        """
+        if not scores_by_horse:
+            return
+        
+        # (horse, race) is unique, so within one race horse_id identifies the row
+        existing = {
+            score.horse_id: score
+            for score in HorseScore.objects.filter(race=race, horse_id__in=scores_by_horse)
+        }
+        
+        to_create, to_update = [], []
+        now = timezone.now()
+        for horse_id, values in scores_by_horse.items():
+            fields = self._score_columns(values)
+            score = existing.get(horse_id)
+            if score is None:
+                to_create.append(HorseScore(horse_id=horse_id, race=race, **self.HORSE_SCORE_DEFAULTS, **fields))
+            elif not self._score_unchanged(score, fields):
+                for name, value in fields.items():
+                    setattr(score, name, value)
+                score.updated_at = now
+                to_update.append(score)
+        
+        try:
+            # Savepoint, so a failed statement leaves Step 8's transaction usable
+            with transaction.atomic():
+                if to_create:
+                    HorseScore.objects.bulk_create(to_create, batch_size=200)
+                if to_update:
+                    HorseScore.objects.bulk_update(to_update, fields=self.HORSE_SCORE_FIELDS, batch_size=200)
+            return
+        except Exception as e:
+            self.stdout.write(self.style.WARNING(f"⚠️ Bulk score write failed, saving one by one: {e}"))
+        
+        for is_new, scores in ((True, to_create), (False, to_update)):
+            for score in scores:
+                try:
+                    with transaction.atomic():
+                        if is_new:
+                            score.save()
+                        else:
+                            score.save(update_fields=self.HORSE_SCORE_FIELDS)
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"    ❌ Error saving score for horse {score.horse_id}: {e}"))
+
+    @staticmethod
+    def _score_columns(values):
+        """
+        Map calculate_horse_score's values onto HorseScore columns. Values with
+        no column of their own (distance, stamina, track affinity, recovery,
+        days since last run) only feed overall_score.
+        """
+        return {
+            'overall_score': values['overall_score'],
+            'form_score': values['form_score'],
+            'class_score': values['class_score'],
+            'consistency_score': values['consistency_score'],
+            'speed_score': values['speed_rating'],
+            'speed_rating_score': values['speed_rating'],
+            'current_mr_score': values['merit_score'],
+            'jt_score': (values['jockey_score'] + values['trainer_score']) / 2,
+            'calculated_at': values['calculated_at'],
+        }
+
+    @staticmethod
+    def _score_unchanged(score, fields):
+        """True if an existing HorseScore already holds `fields` (calculated_at aside)."""
+        for name, value in fields.items():
+            if name == 'calculated_at':
+                continue
+            current = getattr(score, name, None)
+            if isinstance(value, float) or isinstance(current, float):
+                if current is None or value is None or abs(current - value) > 1e-6:
+                    return False
+            elif current != value:
+                return False
+        return True
+
     def print_horse_rankings(self, ranked_horses):
         """Print the horse rankings in a readable format"""
         if not ranked_horses:
             return
             
-        self.stdout.write("\n🏇 Horse Rankings:")
-        self.stdout.write("{:<5} {:<5} {:<20} {:<8} {:<8} {:<8} {:<8} {:<8} {:<10}".format(
-            "Rank", "No", "Name", "Score", "Merit", "Class", "Form", "J-T", "Trend"
-        ))
-        
-        for horse_data in ranked_horses:
-            horse = horse_data['horse']
-            rank = horse_data['rank']
-            score = horse_data['score']
-            merit_score = horse_data.get('merit_score', 0)
-            class_score = horse_data.get('class_score', 0)
-            form_score = horse_data.get('form_score', 0)
-            jt_score = horse_data.get('jt_score', 0)
-            
-            horse_no = getattr(horse, 'horse_no', 'N/A')
-            horse_name = getattr(horse, 'horse_name', 'Unknown')[:18]
-            
-            self.stdout.write("{:<5} {:<5} {:<20} {:<8.1f} {:<8} {:<8.1f} {:<8.1f} {:<8.1f} {:<10}".format(
-                rank,
-                horse_no,
-                horse_name,
-                score,
-                merit_score,
-                class_score,
-                form_score,
-                jt_score,
+        # Build the whole table and emit it with a single write
+        row_format = self.RANKING_ROW.format
+        lines = ["\n🏇 Horse Rankings:", self.RANKING_HEADER]
+        lines.extend(
+            row_format(
+                horse_data['rank'],
+                getattr(horse_data['horse'], 'horse_no', 'N/A'),
+                getattr(horse_data['horse'], 'horse_name', 'Unknown')[:18],
+                horse_data['score'],
+                horse_data.get('merit_score', 0),
+                horse_data.get('class_score', 0),
+                horse_data.get('form_score', 0),
+                horse_data.get('jt_score', 0),
                 "stable"  # placeholder
-            ))
+            )
+            for horse_data in ranked_horses
+        )
+        self.stdout.write("\n".join(lines))
+
     def _save_rankings_to_db(self, race, ranked_horses):
         """Save rankings to the database - clear existing first"""
         # Clear existing rankings for this race
         deleted_count, _ = Ranking.objects.filter(race=race).delete()
         self.stdout.write(f"  🗑️ Cleared {deleted_count} existing rankings")
         
-        # Create new rankings
-        for horse_data in ranked_horses:
-            ranking_data = {
-                'race': race,
-                'horse': horse_data['horse'],
-                'score': horse_data['score'],
-                'merit_score': horse_data.get('merit_score', 0),
-                'class_score': horse_data.get('class_score', 0),
-                'form_score': horse_data.get('form_score', 0),
-                'rank': horse_data['rank'],
-                'jt_score': horse_data.get('jt_score', 0),
-                'jt_rating': self.get_jt_rating(horse_data.get('jt_score', 0)),
-                'jockey': horse_data.get('jockey', ''),
-                'trainer': horse_data.get('trainer', ''),
-                'class_trend': horse_data.get('class_trend', 'stable'),
-            }
-            Ranking.objects.create(**ranking_data)
+        # Create new rankings in one multi-row INSERT
+        rankings = [
+            Ranking(
+                race=race,
+                horse=horse_data['horse'],
+                score=horse_data['score'],
+                merit_score=horse_data.get('merit_score', 0),
+                class_score=horse_data.get('class_score', 0),
+                form_score=horse_data.get('form_score', 0),
+                rank=horse_data['rank'],
+                jt_score=horse_data.get('jt_score', 0),
+                jt_rating=self.get_jt_rating(horse_data.get('jt_score', 0)),
+                jockey=horse_data.get('jockey', ''),
+                trainer=horse_data.get('trainer', ''),
+                class_trend=horse_data.get('class_trend', 'stable'),
+            )
+            for horse_data in ranked_horses
+        ]
+        Ranking.objects.bulk_create(rankings, batch_size=500)
         
         self.stdout.write(f"  ✅ Created {len(ranked_horses)} new rankings")
     def _calculate_advanced_scores(self, race):
         """Calculate and store advanced HorseScore records"""
-        from racecard.services.scoring_service import HorseScoringService
-        
         self.stdout.write("\n[STEP 9] Calculating advanced horse scores...")
         
-        horses = Horse.objects.filter(race=race)
-        scores_created = 0
-        scores_updated = 0
+        # race is the only FK on Horse (jockey/trainer are plain columns)
+        horses = Horse.objects.filter(race=race).select_related('race')
+        try:
+            records, created_ids, failures = HorseScoringService.bulk_create_score_records(horses, race)
+        except Exception as e:
+            self.stdout.write(self.style.WARNING(f"⚠️ Could not calculate scores for race {race.race_no}: {e}"))
+            return 0
         
-
-        for horse in horses:
-            try:
-                scoring_service = HorseScoringService(horse, race)
-                score_record, created = scoring_service.create_score_record()
-                
-                action = "Created" if created else "Updated"
-                if created:
-                    scores_created += 1
-                else:
-                    scores_updated += 1
-                    
+        for horse, e in failures:
+            self.stdout.write(self.style.WARNING(f"⚠️ Could not calculate score for {horse.horse_name}: {e}"))
+        
+        scores_created = len(created_ids)
+        scores_updated = len(records) - scores_created
+        if self.verbosity >= 2:
+            for score_record in records:
+                action = "Created" if score_record.horse_id in created_ids else "Updated"
                 self.stdout.write(
-                    f"  📊 {horse.horse_name}: {action} score - Overall={score_record.overall_score:.3f} "
+                    f"  📊 {score_record.horse.horse_name}: {action} score - Overall={score_record.overall_score:.3f} "
                     f"(M:{score_record.merit_score:.3f}, F:{score_record.form_score:.3f}, "
                     f"D:{score_record.distance_score:.3f}, C:{score_record.consistency_score:.3f})"
                 )
-                
-            except Exception as e:
-                self.stdout.write(self.style.WARNING(f"⚠️ Could not calculate score for {horse.horse_name}: {e}"))
         
         self.stdout.write(self.style.SUCCESS(
             f"✅ Advanced scores processed: {scores_created} created, {scores_updated} updated"
@@ -1194,17 +1476,22 @@ class Command(BaseCommand):
                 }
             )
             
-            # Create horse results based on predictions (not actual results yet)
-            for horse_data in ranked_horses:
-                ManualHorseResult.objects.get_or_create(
-                    manual_result=manual_result,
-                    horse=horse_data['horse'],
-                    defaults={
-                        'position': horse_data['rank'],  # Predicted position
-                        'margin': '',
-                        'time': '',
-                    }
-                )
+            # Create horse results based on predictions (not actual results yet);
+            # rows already present for (manual_result, horse) are left as they are
+            ManualHorseResult.objects.bulk_create(
+                [
+                    ManualHorseResult(
+                        manual_result=manual_result,
+                        horse=horse_data['horse'],
+                        position=horse_data['rank'],  # Predicted position
+                        margin='',
+                        time='',
+                    )
+                    for horse_data in ranked_horses
+                ],
+                batch_size=500,
+                ignore_conflicts=True,
+            )
             
             self.stdout.write(f"✅ Created manual results for racecard_02")
             
@@ -1253,20 +1540,43 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         html_file = options["html_file"]
         update_existing = options["update"]
+        self.verbosity = options["verbosity"]
+        self.rebuild_jt = options["rebuild_jt"]
+        paths = [html_file] + list(options["files"] or [])
 
         # Step 1: file existence
-        self.stdout.write(f"\n[STEP 1] Checking file: {html_file}")
-        if not os.path.exists(html_file):
-            self.stdout.write(self.style.ERROR("❌ File not found. Aborting."))
+        existing_paths = []
+        for path in paths:
+            self.stdout.write(f"\n[STEP 1] Checking file: {path}")
+            if not os.path.exists(path):
+                self.stdout.write(self.style.ERROR("❌ File not found. Skipping."))
+                continue
+            self.stdout.write(self.style.SUCCESS("✅ File exists."))
+            existing_paths.append(path)
+        if not existing_paths:
+            self.stdout.write(self.style.ERROR("❌ No racecard files to import. Aborting."))
             return
-        self.stdout.write(self.style.SUCCESS("✅ File exists."))
 
-        # Step 2: load HTML
-        self.stdout.write("\n[STEP 2] Loading and parsing HTML...")
-        with open(html_file, "r", encoding="utf-8") as fh:
-            soup = BeautifulSoup(fh, "html.parser")
-        self.stdout.write(self.style.SUCCESS("✅ HTML loaded into BeautifulSoup."))
+        # Steps 2-9 per file, one file at a time: only one soup is held in
+        # memory, and a file that fails is reported without stopping the batch
+        failed = 0
+        for path in existing_paths:
+            self.stdout.write(f"\n=== Importing {path} ===")
+            try:
+                # Step 2: load HTML
+                self.stdout.write("\n[STEP 2] Loading and parsing HTML...")
+                _, self.html_digest, soup = _load_racecard(path)
+                self.stdout.write(self.style.SUCCESS("✅ HTML loaded into BeautifulSoup."))
+                self._import_racecard(soup, update_existing)
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"❌ Error importing {path}: {e}"))
+                self.stdout.write(traceback.format_exc())
+                failed += 1
+        if failed:
+            self.stdout.write(self.style.WARNING(f"\n⚠️ {failed} of {len(existing_paths)} racecard file(s) failed"))
 
+    def _import_racecard(self, soup, update_existing):
+        """Steps 3-9 for one parsed racecard: race header, horses, rankings, scores."""
         # Step 3: parse header (left) td
         self.stdout.write("\n[STEP 3] Extracting header block (course/date/no/time)...")
         header = self._parse_header_td(soup)
@@ -1359,36 +1669,16 @@ class Command(BaseCommand):
         # Step 8: Calculate and store rankings
         self.stdout.write("\n[STEP 8] Calculating horse rankings...")
         try:
-            ranked_horses = self.rank_horses(race)
-            self.print_horse_rankings(ranked_horses)
-            self._save_rankings_to_db(race, ranked_horses)
+            # Scores, rankings and their clean-up commit together
+            # (rank_horses prints the table and saves the rankings itself)
+            with transaction.atomic():
+                self.rank_horses(race)
             self.stdout.write(self.style.SUCCESS("✅ Rankings calculated and stored."))
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"❌ Error calculating rankings: {e}"))
-            import traceback
             self.stdout.write(traceback.format_exc())
 
         self.stdout.write(self.style.SUCCESS("\n✅ Done. Racecard import finished."))
 
         # Step 9: Calculate advanced scores for AI
         self._calculate_advanced_scores(race)
-
-
-    
-        
-         # Step 8: Calculate and store rankings
-        self.stdout.write("\n[STEP 8] Calculating horse rankings...")
-        try:
-            ranked_horses = self.rank_horses(race)
-            self.print_horse_rankings(ranked_horses)
-            self._save_rankings_to_db(race, ranked_horses)
-            self.stdout.write(self.style.SUCCESS("✅ Rankings calculated and stored."))
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f"❌ Error calculating rankings: {e}"))
-            import traceback
-            self.stdout.write(traceback.format_exc())
-
-        self.stdout.write(self.style.SUCCESS("\n✅ Done. Racecard import finished."))
-
-        # Step 9: Calculate advanced scores for AI
-        self._calculate_advanced_scores(race)
\ No newline at end of file
@@ -1,35 +1,97 @@
 # racecard_02/management/commands/import_racecard_02.py
+import io
+import logging
 import os
-import sys
-import django
 import re
+import traceback
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from operator import itemgetter
 from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
-import requests
-
-# Django setup
-sys.path.append('/home/wrf/deployed/django/projects/sa_racecard')
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sa_racecard.settings')
-django.setup()
+from bs4 import BeautifulSoup, SoupStrainer
 
+import django
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from django.db import transaction
+from django.db import connections, transaction
 from django.shortcuts import get_object_or_404
 
 from racecard_02.models import Race, Horse, HorseScore
 from racecard_02.services.scoring_service import HorseScoringService
 
+logger = logging.getLogger(__name__)
+
+
+# Rows per INSERT/UPDATE statement for bulk writes (override in settings)
+BULK_BATCH_SIZE = getattr(settings, 'RACECARD_BULK_BATCH', 500)
+
+# J-T rating bands: score >= threshold[i] earns label[i + 1]
+_JT_THRESHOLDS = (20, 40, 60, 80)
+_JT_LABELS = ("Poor", "Average", "Good", "Very Good", "Excellent")
+
+# Precompiled patterns (used per horse / per table)
+_BRACKET_RE = re.compile(r'\[(\d+)\]')          # speed index "[81]"
+_DIGIT_RE = re.compile(r'\d+')
+_WORD_NUMBER_RE = re.compile(r'\b\d+\b')
+_AGE_CONTEXT_RE = re.compile(r'\b(\d{1,2})\s*y\.?\s*o\.?', re.I)  # age "6 y. o."
+_FILENAME_RACE_RE = re.compile(r'_(\d{2})_')     # "20250906_09_Track.html"
+_BEST_MR_RE = re.compile(r'Best\s+(?:WR|MR|Rating):\s*(\d+)', re.I)
+_HAS_DIGIT = re.compile(r'\d').search
+_HNUM_RE = re.compile(r'\d{1,2}\Z').match                  # J-T horse number cell
+_JT_ANCHOR_RE = re.compile(r'Trainer.{0,3}Jockey|Jockey.{0,3}Trainer', re.I)  # J-T banner row
+
+# Detailed rankings column widths: Pos, No, Horse, Total, BestMR, CurMR, JT, Form, Class, Speed
+_DETAIL_WIDTHS = (4, 4, 20, 6, 6, 6, 6, 6, 6, 6)
+_DETAIL_HEADER = f"{'Pos':<4} {'No':<4} {'Horse':<20} {'Total':<6} {'BestMR':<6} {'CurMR':<6} {'JT':<6} {'Form':<6} {'Class':<6} {'Speed':<6}"
+_EQ100 = "=" * 100
+_DASH100 = "-" * 100
 
+# Characters that mark a J-T cell as dates/race info rather than a name
+_NOT_NAME_CHARS = frozenset('()/')
+
+# Everything the importer reads (horse blocks, J-T and PREDICTED FINISH
+# tables) sits inside <table>; skip building the head, scripts and page chrome
+_TABLE_STRAINER = SoupStrainer('table')
+
+
+def parse_file_to_dicts(file_path, debug=False):
+    """
+    ProcessPoolExecutor worker for --date: parse one racecard file into plain
+    data (no ORM objects, no DB access). Returns (file_path, extracted, log),
+    where extracted is Command._extract_horses' (jt_analysis_data, horses)
+    pair, or None if the file failed, and log is the captured parse output.
+    """
+    out = io.StringIO()
+    command = Command(stdout=out, no_color=True)
+    command.debug = debug
+    command.current_file_path = file_path
+    try:
+        with open(file_path, 'rb') as f:
+            soup = BeautifulSoup(f.read(), 'lxml', from_encoding='utf-8', parse_only=_TABLE_STRAINER)
+        return file_path, command._extract_horses(soup), out.getvalue()
+    except Exception:
+        out.write(traceback.format_exc())
+        return file_path, None, out.getvalue()
 
 
 class Command(BaseCommand):
     help = 'Import racecard data from HTML files'
+
+    # Horse columns written by _parse_horses (bulk_update field list)
+    HORSE_FIELDS = [
+        'horse_name', 'blinkers', 'age', 'dob', 'odds', 'horse_merit',
+        'best_merit_rating', 'speed_rating', 'race_class', 'trainer',
+        'jockey', 'jt_score', 'jt_rating',
+    ]
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.jt_analysis_cache = {}
         self.current_file_path = None
+        # Debug dumps (table HTML, selector probes) only at --verbosity 2+
+        self.debug = False
 
     def _text(self, element):
         """Safe text extraction"""
@@ -50,6 +112,12 @@ class Command(BaseCommand):
             type=str,
             help='Date to process (YYYY-MM-DD)'
         )
+        parser.add_argument(
+            '--dir',
+            type=str,
+            default='.',
+            help='Directory holding the racecard HTML files for --date'
+        )
         parser.add_argument(
             '--update-existing',
             action='store_true',
@@ -62,6 +130,7 @@ class Command(BaseCommand):
         filename = options.get('filename')  # Now gets positional argument
         target_date = options.get('date')
         update_existing = options.get('update_existing', False)
+        self.debug = options.get('verbosity', 1) >= 2
         
         try:
             if filename:
@@ -69,7 +138,7 @@ class Command(BaseCommand):
                 self._process_single_file(filename, update_existing)
             elif target_date:
                 self.stdout.write(f"📅 Processing date: {target_date}")
-                self._process_date(target_date, update_existing)
+                self._process_date(target_date, update_existing, options.get('dir') or '.')
             else:
                 self.stdout.write(self.style.ERROR("❌ Please specify a filename or --date"))
                 
@@ -78,10 +147,44 @@ class Command(BaseCommand):
             import traceback
             self.stdout.write(self.style.ERROR(f"Traceback: {traceback.format_exc()}"))
         
-    def _process_date(self, date_str, update_existing):
-        """Process all files for a given date"""
+    def _process_date(self, date_str, update_existing, directory='.'):
+        """
+        Process all files for a given date (YYYYMMDD_NN_Track.html). The HTML
+        parsing runs in worker processes; the DB writes stay in this process.
+        """
         self.stdout.write(f"📅 Processing date: {date_str}")
-        self.stdout.write(self.style.WARNING("⚠️ Date processing not fully implemented yet"))
+        prefix = date_str.replace('-', '')
+        file_list = sorted(
+            os.path.join(directory, f) for f in os.listdir(directory)
+            if f.startswith(prefix) and f.endswith('.html')
+        )
+        if not file_list:
+            self.stdout.write(self.style.WARNING(f"⚠️ No racecard files for {date_str} in {directory}"))
+            return []
+        self.stdout.write(f"📁 Found {len(file_list)} files")
+
+        # Each file is one race; a single race isn't worth a worker pool
+        if len(file_list) == 1:
+            return self._process_single_file(file_list[0], update_existing)
+
+        # Forked workers must not share this process's DB socket; Django
+        # reconnects here on the next query
+        connections.close_all()
+
+        races = []
+        workers = min(len(file_list), os.cpu_count() or 1)
+        # spawn/forkserver workers (macOS, Windows) start without Django
+        # configured; set it up before they import this module
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as ex:
+            for file_path, extracted, log in ex.map(parse_file_to_dicts, file_list, repeat(self.debug)):
+                self.stdout.write(f"📁 Processing file: {file_path}")
+                self.stdout.write(log, ending='')
+                if extracted is None:
+                    self.stdout.write(self.style.ERROR(f"❌ Error processing file {file_path}"))
+                    continue
+                self.current_file_path = file_path
+                races.extend(self._process_races(None, update_existing, extracted))
+        return races
     
     def _process_single_file(self, file_path, update_existing):
         """Process a single HTML file and return the races"""
@@ -89,60 +192,78 @@ class Command(BaseCommand):
         self.current_file_path = file_path
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-            
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # Parse races
-            races = self._parse_races(soup, update_existing)
-            self.stdout.write(self.style.SUCCESS(f"✅ Races processed: {len(races)}"))
-            
-            # Parse horses for each race from this file
-            for race in races:
-                horses_created = self._parse_horses(soup, race, update_existing)
-                self.stdout.write(self.style.SUCCESS(f"✅ Horses processed for race {race.race_no}: {horses_created}"))
-                
-                # Calculate scores
-                self._calculate_horse_scores(race)
+            # Hand lxml the raw bytes; it decodes in C, and declaring the
+            # encoding skips BS4's charset sniffing
+            with open(file_path, 'rb') as f:
+                html_bytes = f.read()
             
-            return races
+            soup = BeautifulSoup(html_bytes, 'lxml', from_encoding='utf-8', parse_only=_TABLE_STRAINER)
+            return self._process_races(soup, update_existing)
             
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"❌ Error processing file {file_path}: {str(e)}"))
             import traceback
             self.stdout.write(self.style.ERROR(f"Traceback: {traceback.format_exc()}"))
             return []
+
+    def _process_races(self, soup, update_existing, extracted=None):
+        """
+        Create the file's races, then save horses and scores for each. soup is
+        None when a --date worker already produced the extracted horse data.
+        """
+        # Parse races
+        races = self._parse_races(soup, update_existing)
+        self.stdout.write(self.style.SUCCESS(f"✅ Races processed: {len(races)}"))
+        
+        # Parse horses for each race from this file. _parse_horses commits the
+        # race's horses in its own transaction, so a scoring failure can't
+        # roll back the import
+        for race in races:
+            horses_created = self._parse_horses(soup, race, update_existing, extracted)
+            self.stdout.write(self.style.SUCCESS(f"✅ Horses processed for race {race.race_no}: {horses_created}"))
+            
+            # Calculate scores
+            try:
+                with transaction.atomic():
+                    self._calculate_horse_scores(race)
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"❌ Error scoring race {race.race_no}: {e}"))
+                self.stdout.write(self.style.ERROR(f"Traceback: {traceback.format_exc()}"))
+        
+        return races
     
     def _parse_races(self, soup, update_existing):
         """Parse race information from HTML and return race objects"""
         self.stdout.write("🔍 Extracting Races...")
         races = []
         
-        # DEBUG: Let's see what's actually in the HTML
-        self.stdout.write("=== DEBUG: Looking for race elements ===")
-        
-        # Try different selectors to find races
-        possible_selectors = [
-            'div.race-header', 'div.race', 'table.race', 
-            'div.event', 'div.race-card', 'div.raceinfo',
-            'h2', 'h3', '.race-title', '.race-name'
-        ]
-        
-        for selector in possible_selectors:
-            elements = soup.select(selector)
-            if elements:
-                self.stdout.write(f"Found {len(elements)} elements with selector: '{selector}'")
-                for i, elem in enumerate(elements[:3]):  # Show first 3
-                    text = elem.get_text(strip=True)
-                    self.stdout.write(f"  {i+1}. '{text}'")
+        # DEBUG: Let's see what's actually in the HTML (--verbosity 2 only;
+        # the probes only log, the race is always built from the filename)
+        if self.debug and soup is not None:
+            self.stdout.write("=== DEBUG: Looking for race elements ===")
+            
+            # Try different selectors to find races: (tag, class) pairs for find_all
+            possible_selectors = [
+                ('div', 'race-header'), ('div', 'race'), ('table', 'race'),
+                ('div', 'event'), ('div', 'race-card'), ('div', 'raceinfo'),
+                ('h2', None), ('h3', None), (True, 'race-title'), (True, 'race-name')
+            ]
+            
+            for name, css_class in possible_selectors:
+                elements = soup.find_all(name, class_=css_class) if css_class else soup.find_all(name)
+                selector = f"{name if name is not True else ''}{'.' + css_class if css_class else ''}"
+                if elements:
+                    self.stdout.write(f"Found {len(elements)} elements with selector: '{selector}'")
+                    for i, elem in enumerate(elements[:3]):  # Show first 3
+                        text = elem.get_text(strip=True)
+                        self.stdout.write(f"  {i+1}. '{text}'")
         
         # Fallback: Create a race from filename
         self.stdout.write("⚠️ No races found with selectors, creating from filename...")
         
         # Extract race number from filename (e.g., "20250906_09_Turffontein_New_Course.html")
         filename = os.path.basename(self.current_file_path)
-        match = re.search(r'_(\d{2})_', filename)
+        match = _FILENAME_RACE_RE.search(filename)
         
         if match:
             race_no = int(match.group(1))
@@ -171,92 +292,165 @@ class Command(BaseCommand):
 
 
 
-    def _parse_horses(self, soup, race, update_existing: bool):
+    @transaction.atomic
+    def _parse_horses(self, soup, race, update_existing: bool, extracted=None):
+        """
+        Save the race's horses. extracted is the (jt_analysis_data, horses)
+        pair from _extract_horses; it is parsed from soup when not given.
         """
-        Parse horse blocks. We only consider tables that:
+        self.stdout.write(f"\n🔍 Extracting Horses for Race {race.race_no}...")
+        if extracted is None:
+            extracted = self._extract_horses(soup)
+        jt_analysis_data, horses = extracted
+        
+        # Store in class cache for later use in score calculation
+        self.jt_analysis_cache = jt_analysis_data
+        self.stdout.write(f"✅ Stored J-T data in class cache: {len(self.jt_analysis_cache)} horses")
+        
+        # Existing horses for this race, so the loop only builds objects and
+        # the writes go out as one bulk_create plus one bulk_update
+        existing = {
+            h.horse_no: h
+            for h in Horse.objects.filter(race=race).only('id', 'horse_no')
+        }
+        to_create, to_update = {}, {}
+        
+        # Race attributes read once, not per horse
+        race_class_default = race.race_class or ""
+        race_pk = race.pk
+        
+        for horse_no, defaults in horses:
+            defaults = dict(defaults, race_class=race_class_default)
+            obj = existing.get(horse_no)
+            if obj is None:
+                to_create[horse_no] = Horse(race_id=race_pk, horse_no=horse_no, **defaults)
+            else:
+                for field, value in defaults.items():
+                    setattr(obj, field, value)
+                to_update[horse_no] = obj
+        created_or_updated = len(horses)
+
+        if to_create:
+            Horse.objects.bulk_create(list(to_create.values()), batch_size=BULK_BATCH_SIZE)
+        if to_update:
+            Horse.objects.bulk_update(list(to_update.values()), fields=self.HORSE_FIELDS, batch_size=BULK_BATCH_SIZE)
+        self.stdout.write(f"🐎 Inserted {len(to_create)} / updated {len(to_update)} horses")
+
+        # Read back the stored speed ratings once per race (replaces the old
+        # per-horse refresh_from_db check)
+        if self.debug:
+            stored = dict(Horse.objects.filter(race=race).values_list('horse_no', 'speed_rating'))
+            self.stdout.write(f"✅ Verified speed_rating in DB: {stored}")
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Horses saved: {created_or_updated}"))
+        
+        return created_or_updated
+
+    def _extract_horses(self, soup):
+        """
+        Parse horse blocks into plain data, without touching the DB. We only
+        consider tables that:
         - have border="border"
         - contain a <div class="b4"> with a numeric horse number
+        Returns (jt_analysis_data, [(horse_no, horse field dict), ...]); the
+        per-race race_class is filled in by _parse_horses.
         """
-        self.stdout.write(f"\n🔍 Extracting Horses for Race {race.race_no}...")
-        created_or_updated = 0
-        horse_tables = soup.select('table[border="border"]')
+        tables = self._classify_tables(soup)
+        horse_tables = tables['horse_tables']
         self.stdout.write(f"Found {len(horse_tables)} horse tables")
         
-        # DEBUG: See what's in the tables
-        self._debug_horse_tables(horse_tables)
+        # DEBUG: See what's in the tables (renders table HTML; --verbosity 2 only)
+        if self.debug:
+            self._debug_horse_tables(horse_tables)
         
-        # FIRST: Find and parse the jockey-trainer stats table
-        jt_analysis_data = self._parse_jockey_trainer_table(soup)
+        # FIRST: Find and parse the jockey-trainer stats table; try the table
+        # under the "Trainer/Jockey Combinations" banner before scanning them all
+        jt_analysis_data = {}
+        if tables['jt'] is not None:
+            jt_analysis_data = self._parse_jockey_trainer_table([tables['jt']])
+        if not jt_analysis_data:
+            jt_analysis_data = self._parse_jockey_trainer_table(tables['all'])
         self.stdout.write(f"J-T analysis data keys: {list(jt_analysis_data.keys())}")
         
-        # Store in class cache for later use in score calculation
-        self.jt_analysis_cache = jt_analysis_data
-        self.stdout.write(f"✅ Stored J-T data in class cache: {len(self.jt_analysis_cache)} horses")
-        
         # NEW: Find the PREDICTED FINISH table specifically
         speed_index_data = {}
+        out = []  # log lines, written once after the scan
+        # Per-row diagnostics only at --verbosity 2; the summary always prints
+        debug = self.debug
         
-        # Look for the specific table structure with PREDICTED FINISH header
-        all_tables = soup.find_all('table')
-        for table in all_tables:
-            # Check if this table has the PREDICTED FINISH header with class 'bld'
-            predicted_finish_header = table.find('td', class_='bld')
-            if predicted_finish_header and 'PREDICTED FINISH' in predicted_finish_header.get_text():
-                self.stdout.write("✅ Found PREDICTED FINISH table")
-                
-                # Find all rows in this table (skip the header rows)
-                rows = table.find_all('tr')
-                for i, row in enumerate(rows):
-                    # Skip the first two header rows
-                    if i < 2:
-                        continue
+        # Tables with the PREDICTED FINISH header (class 'bld'), found by _classify_tables
+        for table in tables['predicted_finish']:
+            out.append("✅ Found PREDICTED FINISH table")
+            
+            # Find all rows in this table; the first two are header rows
+            rows = table.find_all('tr')
+            for row in rows[2:]:
+                # Direct cells only, so a table nested in a cell can't shift the columns
+                cells = row.find_all('td', recursive=False)
+                if len(cells) >= 4:  # Should have at least No, Horse, Len/Beh, Speed Index
+                    try:
+                        # One walk over the row's strings; it lines up with the
+                        # cells only when each cell holds exactly one string,
+                        # otherwise read the cells we need one by one
+                        parts = list(row.stripped_strings)
+                        if len(parts) != len(cells):
+                            parts = [cell.get_text(strip=True) for cell in cells[:4]]
                         
-                    cells = row.find_all('td')
-                    if len(cells) >= 4:  # Should have at least No, Horse, Len/Beh, Speed Index
-                        try:
-                            # First cell should contain horse number
-                            horse_no_text = cells[0].get_text(strip=True)
-                            if not horse_no_text.isdigit():
-                                continue
-                            horse_no = int(horse_no_text)
-                            
-                            # Speed index is typically in the 4th cell (index 3) and is enclosed in []
-                            speed_text = cells[3].get_text(strip=True)
-                            
-                            # Extract number from square brackets [81] -> 81
-                            bracket_match = re.search(r'\[(\d+)\]', speed_text)
-                            if bracket_match:
-                                speed_index = int(bracket_match.group(1))
-                                speed_index_data[horse_no] = speed_index
-                                self.stdout.write(f"✅ Extracted speed index for horse {horse_no}: {speed_index}")
-                            else:
-                                # Try to find any numeric value in the cell
-                                digit_match = re.search(r'\d+', speed_text)
-                                if digit_match:
-                                    speed_index = int(digit_match.group())
-                                    speed_index_data[horse_no] = speed_index
-                                    self.stdout.write(f"✅ Extracted speed index (no brackets) for horse {horse_no}: {speed_index}")
-                                else:
-                                    self.stdout.write(f"❌ No speed index found for horse {horse_no}: '{speed_text}'")
-                        except (ValueError, IndexError) as e:
-                            self.stdout.write(f"Error parsing row in predicted finish table: {e}")
+                        # First cell should contain horse number
+                        horse_no_text = parts[0]
+                        if not horse_no_text.isdigit():
                             continue
+                        horse_no = int(horse_no_text)
+                        
+                        # Speed index is typically in the 4th cell (index 3) and is enclosed in []
+                        speed_text = parts[3]
+                        
+                        # Extract number from square brackets [81] -> 81
+                        bracket_match = _BRACKET_RE.search(speed_text)
+                        if bracket_match:
+                            speed_index = int(bracket_match.group(1))
+                            speed_index_data[horse_no] = speed_index
+                            if debug:
+                                out.append(f"✅ Extracted speed index for horse {horse_no}: {speed_index}")
+                        else:
+                            # Try to find any numeric value in the cell
+                            digit_match = _DIGIT_RE.search(speed_text)
+                            if digit_match:
+                                speed_index = int(digit_match.group())
+                                speed_index_data[horse_no] = speed_index
+                                if debug:
+                                    out.append(f"✅ Extracted speed index (no brackets) for horse {horse_no}: {speed_index}")
+                            elif debug:
+                                out.append(f"❌ No speed index found for horse {horse_no}: '{speed_text}'")
+                    except (ValueError, IndexError) as e:
+                        if debug:
+                            out.append(f"Error parsing row in predicted finish table: {e}")
+                        continue
+            
+            # A card has one PREDICTED FINISH table; stop at the first that yields data
+            if speed_index_data:
+                break
         
-        self.stdout.write(f"Extracted speed indices for {len(speed_index_data)} horses: {speed_index_data}")
+        out.append(f"Extracted speed indices for {len(speed_index_data)} horses: {speed_index_data}")
+        self.stdout.write("\n".join(out))
+        
+        horses = []
+        # One line per horse, written to stdout in a single call after the loop
+        summary_lines = []
         
         for idx, table in enumerate(horse_tables, start=1):
             try:
                 # --- DEBUG: Analyze table structure ---
-                self.stdout.write(f"\n🔍 Analyzing horse table {idx}...")
+                logger.debug("Analyzing horse table %s", idx)
                 
                 first_tr = table.find("tr")
                 if not first_tr:
-                    self.stdout.write(f"Skipping table {idx}: No rows found")
+                    logger.debug("Skipping table %s: no rows found", idx)
                     continue
                     
                 main_tds = first_tr.find_all("td", recursive=False)
                 if len(main_tds) < 2:
-                    self.stdout.write(f"Skipping table {idx}: Not enough main TDs ({len(main_tds)})")
+                    logger.debug("Skipping table %s: not enough main TDs (%s)", idx, len(main_tds))
                     continue
 
                 # --- TD 0: number/odds/rating ---
@@ -264,14 +458,14 @@ class Command(BaseCommand):
                 num_div = td0.find("div", class_="b4")
                 if not num_div:
                     # Not a horse row
-                    self.stdout.write(f"Skipping table {idx}: No b4 div found")
+                    logger.debug("Skipping table %s: no b4 div found", idx)
                     continue
                     
                 try:
                     horse_no = int(self._text(num_div))
-                    self.stdout.write(f"Processing horse {horse_no}...")
+                    logger.debug("Processing horse %s", horse_no)
                 except Exception as e:
-                    self.stdout.write(f"Skipping table {idx}: Could not parse horse number: {e}")
+                    logger.debug("Skipping table %s: could not parse horse number: %s", idx, e)
                     continue
 
                 # --- EXTRACT SPEED INDEX ---
@@ -280,27 +474,23 @@ class Command(BaseCommand):
                 # First check if we already extracted this from the predicted finish table
                 if horse_no in speed_index_data:
                     speed_index = speed_index_data[horse_no]
-                    self.stdout.write(f"✅ Using speed index from predicted finish table: {speed_index}")
+                    logger.debug("Horse %s: speed index %s from predicted finish table", horse_no, speed_index)
                 else:
                     # If not found in the dedicated table, try other methods
-                    self.stdout.write(f"❌ Speed index not found in predicted finish table for horse {horse_no}")
+                    logger.debug("Horse %s: speed index not in predicted finish table", horse_no)
                     
                     # Look for speed index in this specific table (check for bracket format)
-                    speed_elements = table.find_all(string=re.compile(r'\[\d+\]'))
-                    for element in speed_elements:
-                        bracket_match = re.search(r'\[(\d+)\]', element)
-                        if bracket_match:
-                            try:
-                                speed_index = int(bracket_match.group(1))
-                                self.stdout.write(f"✅ Found speed index in brackets: {speed_index}")
-                                break
-                            except ValueError:
-                                continue
+                    # find() stops at the first bracketed string instead of
+                    # collecting every match in the table
+                    element = table.find(string=_BRACKET_RE.search)
+                    if element is not None:
+                        speed_index = int(_BRACKET_RE.search(element).group(1))
+                        logger.debug("Horse %s: speed index %s found in brackets", horse_no, speed_index)
                     
                     # Default if no speed index found
                     if speed_index is None:
                         speed_index = 50  # Default neutral
-                        self.stdout.write(f"ℹ️ Using default speed index for horse {horse_no}: 50")
+                        logger.debug("Horse %s: using default speed index 50", horse_no)
                     else:
                         # Ensure speed index is within reasonable bounds
                         speed_index = max(0, min(100, speed_index))
@@ -312,7 +502,7 @@ class Command(BaseCommand):
                 merit_el = td0.find("span", class_="b1")
                 horse_merit = None
                 if merit_el:
-                    m = re.search(r"\d+", merit_el.get_text())
+                    m = _DIGIT_RE.search(merit_el.get_text())
                     if m:
                         horse_merit = int(m.group())
 
@@ -326,42 +516,25 @@ class Command(BaseCommand):
                     name_cell = td1.find("td", class_="b1")
                     horse_name = self._text(name_cell) or self._text(td1)
                     # Blinkers if "(B)" appears anywhere in the name block
-                    block_text_upper = td1.get_text(" ", strip=True).upper()
-                    blinkers = "(B" in block_text_upper
-
-                    # Age e.g. "6 y. o. b g."
-                    age_text = ""
-                    for s in td1.stripped_strings:
-                        if re.search(r"\by\.?\s*o\.?", s, flags=re.I):
-                            age_text = s
-                            break
-                    m_age = re.search(r"\b(\d{1,2})\b", age_text)
+                    block_text = td1.get_text(" ", strip=True)
+                    blinkers = "(B" in block_text.upper()
+
+                    # Age e.g. "6 y. o. b g." - one search over the block text
+                    m_age = _AGE_CONTEXT_RE.search(block_text)
                     age = m_age.group(1) if m_age else ""
 
                 # --- Extract Best MR from comment section ---
                 best_merit_rating = None
                 comment_section = table.find('td', colspan="21")
-                self.stdout.write(f"✅ comment section: {comment_section}")
+                logger.debug("Horse %s comment section: %s", horse_no, comment_section)
                 if comment_section:
-                    comment_text = comment_section.get_text()
-                    mr_patterns = [
-                        r'Best\s+(WR|MR):\s*(\d+)',
-                        r'Best\s+Rating:\s*(\d+)',
-                    ]
-                    
-                    for pattern in mr_patterns:
-                        match = re.search(pattern, comment_text, re.IGNORECASE)
-                        if match:
-                            try:
-                                mr_value = match.group(2) if len(match.groups()) > 1 else match.group(1)
-                                best_merit_rating = int(mr_value)
-                                self.stdout.write(f"✅ Found Best MR for horse {horse_no}: {best_merit_rating}")
-                                break
-                            except:
-                                continue
+                    match = _BEST_MR_RE.search(comment_section.get_text())
+                    if match:
+                        best_merit_rating = int(match.group(1))
+                        logger.debug("Horse %s: Best MR %s", horse_no, best_merit_rating)
 
                 # --- Jockey / Trainer (nested table) ---
-                itbld_divs = table.select("div.itbld")
+                itbld_divs = table.find_all('div', class_='itbld')
                 jockey, trainer = "", ""
                 if len(itbld_divs) >= 1:
                     jockey = " ".join(itbld_divs[0].stripped_strings)
@@ -380,15 +553,15 @@ class Command(BaseCommand):
                     # Use the jockey/trainer from analysis if available (more accurate)
                     jockey = jt_data.get('jockey', jockey)
                     trainer = jt_data.get('trainer', trainer)
-                    self.stdout.write(f"✅ Found J-T data for horse {horse_no}: Score={jt_score}")
+                    logger.debug("Horse %s: J-T score %s", horse_no, jt_score)
                 else:
-                    self.stdout.write(f"❌ No J-T data found for horse {horse_no}, using default score 50")
+                    logger.debug("Horse %s: no J-T data, using default score 50", horse_no)
 
                 # Ensure safe field lengths
                 age = (age or "")[:10]
                 odds = (odds or "")[:20]
 
-                # Upsert with speed_rating
+                # Field values for the upsert (race_class added per race)
                 defaults = dict(
                     horse_name=horse_name,
                     blinkers=bool(blinkers),
@@ -398,24 +571,14 @@ class Command(BaseCommand):
                     horse_merit=horse_merit if horse_merit is not None else 0,
                     best_merit_rating=best_merit_rating,
                     speed_rating=speed_index,
-                    race_class=race.race_class or "",
                     trainer=trainer,
                     jockey=jockey,
                     jt_score=jt_score,
                     jt_rating=jt_rating,
                 )
-                obj, created = Horse.objects.update_or_create(
-                    race=race, horse_no=horse_no, defaults=defaults
-                )
-                created_or_updated += 1
+                horses.append((horse_no, defaults))
 
-                self.stdout.write(f"💾 Saved horse {horse_no} with speed_rating: {speed_index}")
-                
-                # Verify the save worked
-                obj.refresh_from_db()
-                self.stdout.write(f"✅ Verified speed_rating in DB: {obj.speed_rating}")
-
-                self.stdout.write(
+                summary_lines.append(
                     f"🐎 Horse {horse_no}: {horse_name} | "
                     f"Blinkers={blinkers} | Odds={odds or '-'} | "
                     f"Merit={defaults['horse_merit']} | Best MR={best_merit_rating or '-'} | "
@@ -426,12 +589,35 @@ class Command(BaseCommand):
 
             except Exception as e:
                 self.stdout.write(self.style.WARNING(f"⚠️ Skipping one table (idx {idx}) due to error: {e}"))
-                import traceback
-                self.stdout.write(traceback.format_exc())
+                logger.debug("Traceback for horse table %s", idx, exc_info=True)
 
-        self.stdout.write(self.style.SUCCESS(f"✅ Horses saved: {created_or_updated}"))
-        
-        return created_or_updated
+        if summary_lines:
+            self.stdout.write("\n".join(summary_lines))
+
+        return jt_analysis_data, horses
+
+    def _classify_tables(self, soup):
+        """
+        Walk the document's tables once and bucket them for the parsers:
+          all              - every table, in document order (J-T search)
+          horse_tables     - tables with border="border"
+          predicted_finish - tables whose first td.bld says PREDICTED FINISH
+          jt               - table holding the Trainer/Jockey banner, or None
+        A table can sit in more than one bucket.
+        """
+        anchor = soup.find(string=_JT_ANCHOR_RE)
+        tables = {
+            'all': [], 'horse_tables': [], 'predicted_finish': [],
+            'jt': anchor.find_parent('table') if anchor else None,
+        }
+        for table in soup.find_all('table'):
+            tables['all'].append(table)
+            if table.get('border') == 'border':
+                tables['horse_tables'].append(table)
+            header = table.find('td', class_='bld')
+            if header and 'PREDICTED FINISH' in header.get_text():
+                tables['predicted_finish'].append(table)
+        return tables
 
     def _debug_horse_tables(self, horse_tables):
         """Debug method to see what's in the horse tables"""
@@ -456,29 +642,49 @@ class Command(BaseCommand):
                 self.stdout.write(f"  b1 text: '{div.get_text(strip=True)}'")
             
             # Check for any numbers that might be horse numbers
-            numbers = re.findall(r'\b\d+\b', table.get_text())
+            numbers = _WORD_NUMBER_RE.findall(table.get_text())
             self.stdout.write(f"Numbers found: {numbers}")
         
         self.stdout.write("="*50 + "\n")
         
     def _calculate_horse_scores(self, race):
         """Calculate scores for all horses in a race and display rankings"""
-        self.stdout.write(f"\n📊 Calculating scores for Race {race.race_no}...")
+        write = self.stdout.write  # bound once; called per horse/row below
+        write(f"\n📊 Calculating scores for Race {race.race_no}...")
         
-        horses = Horse.objects.filter(race=race)
-        self.stdout.write(f"Found {horses.count()} horses in database for this race")
+        # One query for the horses (with their race) instead of COUNT + lazy loads
+        horses = list(Horse.objects.filter(race=race).select_related('race'))
+        write(f"Found {len(horses)} horses in database for this race")
         
         scores_data = []  # Store horse scores for ranking
         
+        # Compute every score first, then write the race's rows in bulk
+        existing = {score.horse_id: score for score in HorseScore.objects.filter(race=race)}
+        to_create, to_update = [], []
+        now = timezone.now()
+        
         for horse in horses:
             try:
-                self.stdout.write(f"    🐎 Processing {horse.horse_name} (No. {horse.horse_no})...")
+                write(f"    🐎 Processing {horse.horse_name} (No. {horse.horse_no})...")
                 
                 scoring_service = HorseScoringService(horse, race)
-                score_record, created = scoring_service.create_score_record()
+                fields = scoring_service.score_fields()
+                
+                score_record = existing.get(horse.id)
+                created = score_record is None
+                if created:
+                    score_record = HorseScore(
+                        horse=horse, race=race, **HorseScoringService.UNSCORED_DEFAULTS, **fields
+                    )
+                    to_create.append(score_record)
+                else:
+                    for name, value in fields.items():
+                        setattr(score_record, name, value)
+                    score_record.updated_at = now
+                    to_update.append(score_record)
                 
                 status = "Created" if created else "Updated"
-                self.stdout.write(f"    ✅ {status} score for {horse.horse_name}: {score_record.overall_score}")
+                write(f"    ✅ {status} score for {horse.horse_name}: {score_record.overall_score}")
                 
                 # Store data for ranking
                 scores_data.append({
@@ -488,30 +694,64 @@ class Command(BaseCommand):
                 })
                 
             except Exception as e:
-                self.stdout.write(self.style.ERROR(f"    ❌ Error scoring {horse.horse_name}: {e}"))
+                write(self.style.ERROR(f"    ❌ Error scoring {horse.horse_name}: {e}"))
                 import traceback
-                self.stdout.write(self.style.ERROR(f"    Traceback: {traceback.format_exc()}"))
+                write(self.style.ERROR(f"    Traceback: {traceback.format_exc()}"))
+        
+        self._save_score_records(to_create, to_update)
         
         # Display rankings
         if scores_data:
            # self._display_rankings(scores_data, race)
             self._display_detailed_rankings(scores_data, race)  # Add this if you want detailed view
         else:
-            self.stdout.write("❌ No scores calculated for ranking display")
+            write("❌ No scores calculated for ranking display")
     
 
 
 
-    def _parse_jockey_trainer_table(self, soup):
-        """Find and parse the jockey-trainer statistics table"""
+    def _save_score_records(self, to_create, to_update):
+        """
+        Bulk write the race's HorseScore rows. If the bulk write fails, retry
+        row by row so one bad score doesn't lose the rest.
+        """
+        try:
+            # Savepoint, so a failed statement leaves the outer transaction usable
+            with transaction.atomic():
+                if to_create:
+                    HorseScore.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+                if to_update:
+                    HorseScore.objects.bulk_update(
+                        to_update, fields=HorseScoringService.SCORE_UPDATE_FIELDS, batch_size=BULK_BATCH_SIZE
+                    )
+            return
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f"    ❌ Bulk score write failed, saving one by one: {e}"))
+        
+        for score_record in to_create + to_update:
+            try:
+                with transaction.atomic():
+                    if score_record.pk is None:
+                        score_record.save()
+                    else:
+                        score_record.save(update_fields=HorseScoringService.SCORE_UPDATE_FIELDS)
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(
+                    f"    ❌ Error saving score for {score_record.horse.horse_name}: {e}"
+                ))
+
+    def _parse_jockey_trainer_table(self, tables):
+        """Find and parse the jockey-trainer statistics table among `tables`"""
+        write = self.stdout.write
         jt_analysis_data = {}
         
-        self.stdout.write("🔍 SEARCHING FOR JOCKEY-TRAINER TABLE...")
+        write("🔍 SEARCHING FOR JOCKEY-TRAINER TABLE...")
         
         # Look for ALL tables to find the right one
-        for i, table in enumerate(soup.find_all('table')):
-            # Skip tables that are clearly not J-T tables
-            if table.get('class') and 'small' in table.get('class'):
+        for i, table in enumerate(tables):
+            # Skip tables that are clearly not J-T tables, before reading any cells
+            table_class = table.get('class') or ()
+            if 'small' in table_class or 'results' in table_class or table.get('summary'):
                 continue
                 
             # Get all rows to analyze the table structure
@@ -523,26 +763,28 @@ class Command(BaseCommand):
             is_jt_table = False
             jt_rows_found = 0
             
-            for row in rows[:5]:  # Check first 5 rows
-                cells = row.find_all(['td', 'th'])
-                cell_texts = [cell.get_text(strip=True) for cell in cells]
-                
+            # Cell texts of the first 5 rows, read once and reused below when
+            # the table turns out to be the J-T table
+            head_cells = [self._row_cell_texts(row) for row in rows[:5]]
+            
+            for cell_texts, _ in head_cells:  # Check first 5 rows
                 # J-T table should have horse numbers, trainer/jockey names, and stats
                 if len(cell_texts) >= 9 and len(cell_texts) % 9 == 0:  # Multiple of 9 cells
                     # Look for horse numbers as first element
-                    if cell_texts[0].isdigit() and len(cell_texts[0]) <= 2:
+                    if _HNUM_RE(cell_texts[0]):
                         # Look for trainer/jockey names (not dates or race info)
-                        if (not any(text in cell_texts[1] for text in ['(', ')', '/']) and 
-                            not any(text in cell_texts[2] for text in ['(', ')', '/'])):
+                        if (_NOT_NAME_CHARS.isdisjoint(cell_texts[1]) and
+                            _NOT_NAME_CHARS.isdisjoint(cell_texts[2])):
                             is_jt_table = True
                             jt_rows_found += 1
             
             if is_jt_table and jt_rows_found >= 2:  # Need at least 2 valid rows
-                self.stdout.write(f"🎯 FOUND J-T TABLE {i} with {jt_rows_found} valid rows!")
+                write(f"🎯 FOUND J-T TABLE {i} with {jt_rows_found} valid rows!")
                 
                 # Parse all rows in this table
                 for j, row in enumerate(rows):
-                    jt_results = self.analyze_jockey_trainer_combination(row)
+                    td_texts = head_cells[j][1] if j < len(head_cells) else self._row_cell_texts(row)[1]
+                    jt_results = self.analyze_jockey_trainer_combination(td_texts)
                     
                     for result in jt_results:
                         try:
@@ -557,35 +799,42 @@ class Command(BaseCommand):
                                 'second_places': result.get('second_places', 0),
                                 'third_places': result.get('third_places', 0)
                             }
-                            self.stdout.write(f"  🎯 Horse {horse_no}: J-T Score={result['score']} ({result['jockey']}/{result['trainer']})")
+                            write(f"  🎯 Horse {horse_no}: J-T Score={result['score']} ({result['jockey']}/{result['trainer']})")
                         except (ValueError, KeyError) as e:
                             continue
                 
                 if jt_analysis_data:
-                    self.stdout.write(f"✅ Successfully parsed J-T data from table {i}")
+                    write(f"✅ Successfully parsed J-T data from table {i}")
                     break
         
         if not jt_analysis_data:
-            self.stdout.write("⚠️ No J-T table found, using empty data")
+            write("⚠️ No J-T table found, using empty data")
         else:
-            self.stdout.write(f"✅ SUCCESS: Parsed J-T data for {len(jt_analysis_data)} horses: {list(jt_analysis_data.keys())}")
+            write(f"✅ SUCCESS: Parsed J-T data for {len(jt_analysis_data)} horses: {list(jt_analysis_data.keys())}")
         
         return jt_analysis_data
 
-    def analyze_jockey_trainer_combination(self, html_row):
+    @staticmethod
+    def _row_cell_texts(row):
+        """(texts of the td+th cells, texts of the td cells) of a row; each cell is read once"""
+        cells = row.find_all(['td', 'th'])
+        texts = [cell.get_text(strip=True) for cell in cells]
+        if all(cell.name == 'td' for cell in cells):
+            return texts, texts
+        return texts, [text for cell, text in zip(cells, texts) if cell.name == 'td']
+
+    def analyze_jockey_trainer_combination(self, cell_texts):
         """
-        Analyze jockey-trainer combination from HTML row
+        Analyze jockey-trainer combination from the stripped td texts of one row
         Returns empty list if this doesn't look like a J-T row
         """
-        cells = html_row.find_all('td')
-        cell_texts = [cell.get_text(strip=True) for cell in cells]
-        
+        write = self.stdout.write
         # Skip rows that don't have the right structure
         if len(cell_texts) < 9 or len(cell_texts) % 9 != 0:
             return []
         
         # Additional validation: first cell should be a horse number
-        if not cell_texts[0].isdigit() or len(cell_texts[0]) > 2:
+        if not _HNUM_RE(cell_texts[0]):
             return []
         
         # Check if this looks like past performance data (contains dates, race codes, etc.)
@@ -595,7 +844,7 @@ class Command(BaseCommand):
         if any('/' in text for text in cell_texts[:3]):  # First 3 cells shouldn't have slashes (dates)
             return []
         
-        self.stdout.write(f"🔍 ANALYZING J-T ROW: {cell_texts}")
+        write(f"🔍 ANALYZING J-T ROW: {cell_texts}")
         
         results = []
         
@@ -624,7 +873,7 @@ class Command(BaseCommand):
                 jockey = horse_data[2]
                 
                 # Skip if these don't look like names
-                if any(c.isdigit() for c in trainer) or any(c.isdigit() for c in jockey):
+                if _HAS_DIGIT(trainer) or _HAS_DIGIT(jockey):
                     continue
                 
                 # Parse numeric values
@@ -661,26 +910,17 @@ class Command(BaseCommand):
                     'rating': rating
                 })
                 
-                self.stdout.write(f"✅ Horse {horse_number}: {jockey}/{trainer}, Score={score}")
+                write(f"✅ Horse {horse_number}: {jockey}/{trainer}, Score={score}")
                 
             except Exception as e:
-                self.stdout.write(f"❌ Error parsing horse {horse_index + 1}: {e}")
+                write(f"❌ Error parsing horse {horse_index + 1}: {e}")
                 continue
         
         return results
 
     def _get_jt_rating(self, score):
         """Convert numerical score to qualitative rating"""
-        if score >= 80:
-            return "Excellent"
-        elif score >= 60:
-            return "Very Good"
-        elif score >= 40:
-            return "Good"
-        elif score >= 20:
-            return "Average"
-        else:
-            return "Poor"
+        return _JT_LABELS[bisect_right(_JT_THRESHOLDS, score)]
 
 
 
@@ -763,37 +1003,39 @@ class Command(BaseCommand):
 
     def _display_detailed_rankings(self, scores_data, race):
         """Display detailed rankings with component scores"""
-        self.stdout.write("\n" + "="*100)
-        self.stdout.write(f"📊 DETAILED RANKINGS - Race {race.race_no}")
-        self.stdout.write("="*100)
+        out = []  # table lines, written once at the end
+        out.append("\n" + _EQ100)
+        out.append(f"📊 DETAILED RANKINGS - Race {race.race_no}")
+        out.append(_EQ100)
         
         # Sort by overall score descending
-        sorted_rankings = sorted(scores_data, key=lambda x: x['overall_score'], reverse=True)
+        sorted_rankings = sorted(scores_data, key=itemgetter('overall_score'), reverse=True)
         
         # Display header
-        header = f"{'Pos':<4} {'No':<4} {'Horse':<20} {'Total':<6} {'BestMR':<6} {'CurMR':<6} {'JT':<6} {'Form':<6} {'Class':<6} {'Speed':<6}"
-        self.stdout.write(header)
-        self.stdout.write("-" * 100)
+        out.append(_DETAIL_HEADER)
+        out.append(_DASH100)
         
         # Display each horse with component scores
         for position, data in enumerate(sorted_rankings, 1):
             horse = data['horse']
             score_record = data['score_record']
             
-            self.stdout.write(
-                f"{position:<4} "
-                f"{horse.horse_no:<4} "
-                f"{horse.horse_name:<20} "
-                f"{score_record.overall_score:<6} "
-                f"{score_record.best_mr_score:<6} "
-                f"{score_record.current_mr_score:<6} "
-                f"{score_record.jt_score:<6} "
-                f"{score_record.form_score:<6} "
-                f"{score_record.class_score:<6} "
-                f"{score_record.speed_rating:<6} "
+            values = (
+                position,
+                horse.horse_no,
+                horse.horse_name,
+                score_record.overall_score,
+                score_record.best_mr_score,
+                score_record.current_mr_score,
+                score_record.jt_score,
+                score_record.form_score,
+                score_record.class_score,
+                score_record.speed_rating,
             )
+            out.append(" ".join([str(v).ljust(w) for v, w in zip(values, _DETAIL_WIDTHS)]) + " ")
         
-        self.stdout.write("="*100)
+        out.append(_EQ100)
+        self.stdout.write("\n".join(out))
 
 
 
@@ -3,8 +3,9 @@ import os
 import sys
 import django
 import re
+import traceback
 from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import requests
 
 # Django setup
@@ -12,6 +13,7 @@ sys.path.append('/home/wrf/deployed/django/projects/sa_racecard')
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sa_racecard.settings')
 django.setup()
 
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from django.db import transaction
@@ -20,6 +22,20 @@ from django.shortcuts import get_object_or_404
 from racecard_02.models import Race, Horse, HorseScore, Ranking
 from racecard_02.services.scoring_service import HorseScoringService
 
+# Rows per INSERT/UPDATE statement for bulk writes (override in settings)
+BULK_BATCH_SIZE = getattr(settings, 'RACECARD_BULK_BATCH', 500)
+
+# Everything the parsers read lives inside <table>; skip building the rest
+_RACECARD_STRAINER = SoupStrainer('table')
+
+# Precompiled patterns (used per horse / per table)
+_BRACKET_RE = re.compile(r'\[(\d+)\]')          # speed index "[81]"
+_DIGIT_RE = re.compile(r'\d+')
+_WORD_NUMBER_RE = re.compile(r'\b\d+\b')
+_YO_RE = re.compile(r'\by\.?\s*o\.?', re.I)     # age marker "6 y. o."
+_AGE_RE = re.compile(r'\b(\d{1,2})\b')
+_FILENAME_RACE_RE = re.compile(r'_(\d{2})_')     # "20250906_09_Track.html"
+_BEST_MR_RE = re.compile(r'Best\s+(?:WR|MR|Rating):\s*(\d+)', re.I)
 
 # Add this to the top of your command file
 import django.db.models.sql.query
@@ -38,7 +54,6 @@ def debug_check_query_object_type(self, value, opts, field):
         print(f"   Expected: {field.related_model.__name__} instance")
         
         # Get the stack trace to see where this query originated
-        import traceback
         stack = traceback.extract_stack()
         for frame in stack[-6:]:  # Show last 6 frames
             if 'django' not in frame.filename:  # Filter out Django internals
@@ -49,11 +64,29 @@ def debug_check_query_object_type(self, value, opts, field):
         
     return _original_check_query_object_type(self, value, opts, field)
 
-# Monkey patch for debugging
-django.db.models.sql.query.Query.check_query_object_type = debug_check_query_object_type
+# Monkey patch for debugging; it runs on every ORM lookup, so only when asked
+# for (RACECARD_DEBUG_ORM=1)
+if os.environ.get('RACECARD_DEBUG_ORM') == '1':
+    django.db.models.sql.query.Query.check_query_object_type = debug_check_query_object_type
 
 class Command(BaseCommand):
     help = 'Import racecard data from HTML files'
+
+    # Horse columns written by _parse_horses (bulk_update field list)
+    HORSE_FIELDS = [
+        'horse_name', 'blinkers', 'age', 'dob', 'odds', 'horse_merit',
+        'best_merit_rating', 'speed_rating', 'race_class', 'trainer',
+        'jockey', 'jt_score', 'jt_rating',
+    ]
+    
+    # Ranking score columns, copied from the race's HorseScore rows by
+    # _display_detailed_rankings (Ranking mirrors HorseScore's score columns)
+    RANKING_SCORE_FIELDS = [
+        'overall_score', 'speed_score', 'form_score', 'class_score',
+        'consistency_score', 'value_score', 'physical_score', 'intangible_score',
+        'speed_rating_score', 'best_mr_score', 'current_mr_score', 'jt_score',
+        'odds_score', 'weight_score', 'draw_score', 'blinkers_score',
+    ]
     
     def __init__(self, horse, race, debug_callback=None):
         self.horse = horse
@@ -101,6 +134,8 @@ class Command(BaseCommand):
         filename = options.get('filename')
         target_date = options.get('date')
         update_existing = options.get('update_existing', False)
+        # Debug dumps (every table in the page) only at --verbosity 2+
+        self.debug = options.get('verbosity', 1) >= 2
         
         try:
             if filename:
@@ -128,10 +163,14 @@ class Command(BaseCommand):
         self.current_file_path = file_path
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                html_content = f.read()
+            # Hand lxml the raw bytes; it decodes in C, and declaring the
+            # encoding skips BS4's charset sniffing. Only table subtrees are
+            # kept, and the raw bytes are dropped once parsed.
+            with open(file_path, 'rb') as f:
+                html_bytes = f.read()
             
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = BeautifulSoup(html_bytes, 'lxml', from_encoding='utf-8', parse_only=_RACECARD_STRAINER)
+            del html_bytes
             
             # Parse races
             races = self._parse_races(soup, update_existing)
@@ -158,15 +197,17 @@ class Command(BaseCommand):
         self.stdout.write("🔍 Extracting Races...")
         races = []
         
-        # Try different selectors to find races
+        # Try different selectors to find races: (tag, class) pairs for find_all,
+        # which skips soupsieve's CSS engine
         possible_selectors = [
-            'div.race-header', 'div.race', 'table.race', 
-            'div.event', 'div.race-card', 'div.raceinfo',
-            'h2', 'h3', '.race-title', '.race-name'
+            ('div', 'race-header'), ('div', 'race'), ('table', 'race'),
+            ('div', 'event'), ('div', 'race-card'), ('div', 'raceinfo'),
+            ('h2', None), ('h3', None), (True, 'race-title'), (True, 'race-name')
         ]
         
-        for selector in possible_selectors:
-            elements = soup.select(selector)
+        for name, css_class in possible_selectors:
+            elements = soup.find_all(name, class_=css_class) if css_class else soup.find_all(name)
+            selector = f"{name if name is not True else ''}{'.' + css_class if css_class else ''}"
             if elements:
                 self.stdout.write(f"Found {len(elements)} elements with selector: '{selector}'")
         
@@ -175,7 +216,7 @@ class Command(BaseCommand):
         
         # Extract race number from filename
         filename = os.path.basename(self.current_file_path)
-        match = re.search(r'_(\d{2})_', filename)
+        match = _FILENAME_RACE_RE.search(filename)
         
         if match:
             race_no = int(match.group(1))
@@ -211,34 +252,28 @@ class Command(BaseCommand):
         """
         self.stdout.write(f"\n🔍 Extracting Horses for Race {race.race_no}...")
         created_or_updated = 0
-        horse_tables = soup.select('table[border="border"]')
+        tables = self._classify_tables(soup)
+        horse_tables = tables['horse_tables']
         self.stdout.write(f"Found {len(horse_tables)} horse tables")
         
-        # Debug: show all tables first
-        self._debug_tables(soup)
+        # Debug: show all tables first (--verbosity 2 only)
+        if self.debug:
+            self._debug_tables(tables['all'])
         
         # FIRST: Find and parse the jockey-trainer stats table
-        jt_analysis_data = self._parse_jockey_trainer_table(soup)
-        
-        # FIX: Handle both list and dictionary cases
-        self.stdout.write(f"J-T analysis data type: {type(jt_analysis_data)}")
+        jt_analysis_data = self._parse_jockey_trainer_table(tables['all'])
         
+        # _parse_jockey_trainer_table returns {horse_no: data}; a list of
+        # dicts (older shape) is keyed by each item's horse_no or position
         if isinstance(jt_analysis_data, dict):
-            self.stdout.write(f"J-T analysis data keys: {list(jt_analysis_data.keys())}")
-            # It's already a dictionary, use it as is
             jt_analysis_dict = jt_analysis_data
-        elif isinstance(jt_analysis_data, list):
-            self.stdout.write(f"J-T analysis data length: {len(jt_analysis_data)}")
-            # Convert list to dictionary keyed by horse number
-            jt_analysis_dict = {}
-            for i, jt_item in enumerate(jt_analysis_data):
-                if isinstance(jt_item, dict):
-                    # Try to extract horse number from the item or use index
-                    horse_no = jt_item.get('horse_no', i + 1)
-                    jt_analysis_dict[horse_no] = jt_item
         else:
-            self.stdout.write(f"⚠️ Unexpected J-T data type: {type(jt_analysis_data)}")
-            jt_analysis_dict = {}
+            jt_analysis_dict = {
+                jt_item.get('horse_no', i + 1): jt_item
+                for i, jt_item in enumerate(jt_analysis_data or ())
+                if isinstance(jt_item, dict)
+            }
+        self.stdout.write(f"J-T analysis data keys: {list(jt_analysis_dict.keys())}")
         
         # Store in class cache for later use in score calculation
         self.jt_analysis_cache = jt_analysis_dict
@@ -248,67 +283,77 @@ class Command(BaseCommand):
         # NEW: Find the PREDICTED FINISH table specifically
         speed_index_data = {}
         
-        # Look for the specific table structure with PREDICTED FINISH header
-        all_tables = soup.find_all('table')
-        for table in all_tables:
-            # Check if this table has the PREDICTED FINISH header with class 'bld'
-            predicted_finish_header = table.find('td', class_='bld')
-            if predicted_finish_header and 'PREDICTED FINISH' in predicted_finish_header.get_text():
-                self.stdout.write("✅ Found PREDICTED FINISH table")
-                
-                # Find all rows in this table (skip the header rows)
-                rows = table.find_all('tr')
-                for i, row in enumerate(rows):
-                    # Skip the first two header rows
-                    if i < 2:
-                        continue
+        # Tables with the PREDICTED FINISH header (class 'bld'), found by _classify_tables
+        for table in tables['predicted_finish']:
+            self.stdout.write("✅ Found PREDICTED FINISH table")
+            
+            # Find all rows in this table (skip the header rows)
+            rows = table.find_all('tr')
+            for i, row in enumerate(rows):
+                # Skip the first two header rows
+                if i < 2:
+                    continue
+                    
+                cells = row.find_all('td')
+                if len(cells) >= 4:  # Should have at least No, Horse, Len/Beh, Speed Index
+                    try:
+                        # First cell should contain horse number
+                        horse_no_text = cells[0].get_text(strip=True)
+                        if not horse_no_text.isdigit():
+                            continue
+                        horse_no = int(horse_no_text)
                         
-                    cells = row.find_all('td')
-                    if len(cells) >= 4:  # Should have at least No, Horse, Len/Beh, Speed Index
-                        try:
-                            # First cell should contain horse number
-                            horse_no_text = cells[0].get_text(strip=True)
-                            if not horse_no_text.isdigit():
-                                continue
-                            horse_no = int(horse_no_text)
-                            
-                            # Speed index is typically in the 4th cell (index 3) and is enclosed in []
-                            speed_text = cells[3].get_text(strip=True)
-                            
-                            # Extract number from square brackets [81] -> 81
-                            bracket_match = re.search(r'\[(\d+)\]', speed_text)
-                            if bracket_match:
-                                speed_index = int(bracket_match.group(1))
-                                speed_index_data[horse_no] = speed_index
+                        # Speed index is typically in the 4th cell (index 3) and is enclosed in []
+                        speed_text = cells[3].get_text(strip=True)
+                        
+                        # Extract number from square brackets [81] -> 81
+                        bracket_match = _BRACKET_RE.search(speed_text)
+                        if bracket_match:
+                            speed_index = int(bracket_match.group(1))
+                            speed_index_data[horse_no] = speed_index
+                            if self.debug:
                                 self.stdout.write(f"✅ Extracted speed index for horse {horse_no}: {speed_index}")
-                            else:
-                                # Try to find any numeric value in the cell
-                                digit_match = re.search(r'\d+', speed_text)
-                                if digit_match:
-                                    speed_index = int(digit_match.group())
-                                    speed_index_data[horse_no] = speed_index
+                        else:
+                            # Try to find any numeric value in the cell
+                            digit_match = _DIGIT_RE.search(speed_text)
+                            if digit_match:
+                                speed_index = int(digit_match.group())
+                                speed_index_data[horse_no] = speed_index
+                                if self.debug:
                                     self.stdout.write(f"✅ Extracted speed index (no brackets) for horse {horse_no}: {speed_index}")
-                                else:
-                                    self.stdout.write(f"❌ No speed index found for horse {horse_no}: '{speed_text}'")
-                        except (ValueError, IndexError) as e:
+                            elif self.debug:
+                                self.stdout.write(f"❌ No speed index found for horse {horse_no}: '{speed_text}'")
+                    except (ValueError, IndexError) as e:
+                        if self.debug:
                             self.stdout.write(f"Error parsing row in predicted finish table: {e}")
-                            continue
-        
+                        continue
+    
         self.stdout.write(f"Extracted speed indices for {len(speed_index_data)} horses: {speed_index_data}")
         
+        # Existing horses for this race, so the loop only builds objects and
+        # the writes go out as one bulk_create plus one bulk_update
+        existing = {
+            h.horse_no: h
+            for h in Horse.objects.filter(race=race).only('id', 'horse_no')
+        }
+        to_create, to_update = {}, {}
+        
         for idx, table in enumerate(horse_tables, start=1):
             try:
                 # --- DEBUG: Analyze table structure ---
-                self.stdout.write(f"\n🔍 Analyzing horse table {idx}...")
+                if self.debug:
+                    self.stdout.write(f"\n🔍 Analyzing horse table {idx}...")
                 
                 first_tr = table.find("tr")
                 if not first_tr:
-                    self.stdout.write(f"Skipping table {idx}: No rows found")
+                    if self.debug:
+                        self.stdout.write(f"Skipping table {idx}: No rows found")
                     continue
                     
                 main_tds = first_tr.find_all("td", recursive=False)
                 if len(main_tds) < 2:
-                    self.stdout.write(f"Skipping table {idx}: Not enough main TDs ({len(main_tds)})")
+                    if self.debug:
+                        self.stdout.write(f"Skipping table {idx}: Not enough main TDs ({len(main_tds)})")
                     continue
 
                 # --- TD 0: number/odds/rating ---
@@ -316,14 +361,17 @@ class Command(BaseCommand):
                 num_div = td0.find("div", class_="b4")
                 if not num_div:
                     # Not a horse row
-                    self.stdout.write(f"Skipping table {idx}: No b4 div found")
+                    if self.debug:
+                        self.stdout.write(f"Skipping table {idx}: No b4 div found")
                     continue
                     
                 try:
                     horse_no = int(self._text(num_div))
-                    self.stdout.write(f"Processing horse {horse_no}...")
+                    if self.debug:
+                        self.stdout.write(f"Processing horse {horse_no}...")
                 except Exception as e:
-                    self.stdout.write(f"Skipping table {idx}: Could not parse horse number: {e}")
+                    if self.debug:
+                        self.stdout.write(f"Skipping table {idx}: Could not parse horse number: {e}")
                     continue
 
                 # --- EXTRACT SPEED INDEX ---
@@ -332,27 +380,27 @@ class Command(BaseCommand):
                 # First check if we already extracted this from the predicted finish table
                 if horse_no in speed_index_data:
                     speed_index = speed_index_data[horse_no]
-                    self.stdout.write(f"✅ Using speed index from predicted finish table: {speed_index}")
+                    if self.debug:
+                        self.stdout.write(f"✅ Using speed index from predicted finish table: {speed_index}")
                 else:
                     # If not found in the dedicated table, try other methods
-                    self.stdout.write(f"❌ Speed index not found in predicted finish table for horse {horse_no}")
+                    if self.debug:
+                        self.stdout.write(f"❌ Speed index not found in predicted finish table for horse {horse_no}")
                     
-                    # Look for speed index in this specific table (check for bracket format)
-                    speed_elements = table.find_all(string=re.compile(r'\[\d+\]'))
-                    for element in speed_elements:
-                        bracket_match = re.search(r'\[(\d+)\]', element)
-                        if bracket_match:
-                            try:
-                                speed_index = int(bracket_match.group(1))
-                                self.stdout.write(f"✅ Found speed index in brackets: {speed_index}")
-                                break
-                            except ValueError:
-                                continue
+                    # Look for speed index in this specific table (check for bracket format);
+                    # one regex over the table text, joined with spaces so a
+                    # match can't span two text nodes
+                    bracket_match = _BRACKET_RE.search(table.get_text(' '))
+                    if bracket_match:
+                        speed_index = int(bracket_match.group(1))
+                        if self.debug:
+                            self.stdout.write(f"✅ Found speed index in brackets: {speed_index}")
                     
                     # Default if no speed index found
                     if speed_index is None:
                         speed_index = 50  # Default neutral
-                        self.stdout.write(f"ℹ️ Using default speed index for horse {horse_no}: 50")
+                        if self.debug:
+                            self.stdout.write(f"ℹ️ Using default speed index for horse {horse_no}: 50")
                     else:
                         # Ensure speed index is within reasonable bounds
                         speed_index = max(0, min(100, speed_index))
@@ -364,7 +412,7 @@ class Command(BaseCommand):
                 merit_el = td0.find("span", class_="b1")
                 horse_merit = None
                 if merit_el:
-                    m = re.search(r"\d+", merit_el.get_text())
+                    m = _DIGIT_RE.search(merit_el.get_text())
                     if m:
                         horse_merit = int(m.group())
 
@@ -375,44 +423,36 @@ class Command(BaseCommand):
                 age = ""
 
                 if td1:
+                    # The name block's strings, walked once and reused for the
+                    # name fallback, the blinkers check and the age search
+                    td1_strings = list(td1.stripped_strings)
                     name_cell = td1.find("td", class_="b1")
-                    horse_name = self._text(name_cell) or self._text(td1)
+                    horse_name = self._text(name_cell) or "".join(td1_strings)
                     # Blinkers if "(B)" appears anywhere in the name block
-                    block_text_upper = td1.get_text(" ", strip=True).upper()
+                    block_text_upper = " ".join(td1_strings).upper()
                     blinkers = "(B" in block_text_upper
 
                     # Age e.g. "6 y. o. b g."
                     age_text = ""
-                    for s in td1.stripped_strings:
-                        if re.search(r"\by\.?\s*o\.?", s, flags=re.I):
+                    for s in td1_strings:
+                        if _YO_RE.search(s):
                             age_text = s
                             break
-                    m_age = re.search(r"\b(\d{1,2})\b", age_text)
+                    m_age = _AGE_RE.search(age_text)
                     age = m_age.group(1) if m_age else ""
 
                 # --- Extract Best MR from comment section ---
                 best_merit_rating = None
                 comment_section = table.find('td', colspan="21")
                 if comment_section:
-                    comment_text = comment_section.get_text()
-                    mr_patterns = [
-                        r'Best\s+(WR|MR):\s*(\d+)',
-                        r'Best\s+Rating:\s*(\d+)',
-                    ]
-                    
-                    for pattern in mr_patterns:
-                        match = re.search(pattern, comment_text, re.IGNORECASE)
-                        if match:
-                            try:
-                                mr_value = match.group(2) if len(match.groups()) > 1 else match.group(1)
-                                best_merit_rating = int(mr_value)
-                                self.stdout.write(f"✅ Found Best MR for horse {horse_no}: {best_merit_rating}")
-                                break
-                            except:
-                                continue
+                    match = _BEST_MR_RE.search(comment_section.get_text())
+                    if match:
+                        best_merit_rating = int(match.group(1))
+                        if self.debug:
+                            self.stdout.write(f"✅ Found Best MR for horse {horse_no}: {best_merit_rating}")
 
                 # --- Jockey / Trainer (nested table) ---
-                itbld_divs = table.select("div.itbld")
+                itbld_divs = table.find_all('div', class_='itbld')
                 jockey, trainer = "", ""
                 if len(itbld_divs) >= 1:
                     jockey = " ".join(itbld_divs[0].stripped_strings)
@@ -431,8 +471,9 @@ class Command(BaseCommand):
                     # Use the jockey/trainer from analysis if available (more accurate)
                     jockey = jt_data.get('jockey', jockey)
                     trainer = jt_data.get('trainer', trainer)
-                    self.stdout.write(f"✅ Found J-T data for horse {horse_no}: Score={jt_score}")
-                else:
+                    if self.debug:
+                        self.stdout.write(f"✅ Found J-T data for horse {horse_no}: Score={jt_score}")
+                elif self.debug:
                     self.stdout.write(f"❌ No J-T data found for horse {horse_no}, using default score 50")
 
                 # Ensure safe field lengths
@@ -455,16 +496,17 @@ class Command(BaseCommand):
                     jt_score=jt_score,
                     jt_rating=jt_rating,
                 )
-                obj, created = Horse.objects.update_or_create(
-                    race=race, horse_no=horse_no, defaults=defaults
-                )
+                obj = existing.get(horse_no)
+                if obj is None:
+                    to_create[horse_no] = Horse(race=race, horse_no=horse_no, **defaults)
+                else:
+                    for field, value in defaults.items():
+                        setattr(obj, field, value)
+                    to_update[horse_no] = obj
                 created_or_updated += 1
 
-                self.stdout.write(f"💾 Saved horse {horse_no} with speed_rating: {speed_index}")
-                
-                # Verify the save worked
-                obj.refresh_from_db()
-                self.stdout.write(f"✅ Verified speed_rating in DB: {obj.speed_rating}")
+                if self.debug:
+                    self.stdout.write(f"💾 Queued horse {horse_no} with speed_rating: {speed_index}")
 
                 self.stdout.write(
                     f"🐎 Horse {horse_no}: {horse_name} | "
@@ -480,12 +522,36 @@ class Command(BaseCommand):
                 import traceback
                 self.stdout.write(traceback.format_exc())
 
+        if to_create:
+            Horse.objects.bulk_create(list(to_create.values()), batch_size=BULK_BATCH_SIZE)
+        if to_update:
+            Horse.objects.bulk_update(list(to_update.values()), fields=self.HORSE_FIELDS, batch_size=BULK_BATCH_SIZE)
+        self.stdout.write(f"🐎 Inserted {len(to_create)} / updated {len(to_update)} horses")
+
         self.stdout.write(self.style.SUCCESS(f"✅ Horses saved: {created_or_updated}"))
         
         return created_or_updated
 
 
 
+    def _classify_tables(self, soup):
+        """
+        Walk the document's tables once and bucket them for the parsers:
+          all              - every table, in document order (J-T search, debug)
+          horse_tables     - tables with border="border"
+          predicted_finish - tables whose first td.bld says PREDICTED FINISH
+        A table can sit in more than one bucket.
+        """
+        tables = {'all': [], 'horse_tables': [], 'predicted_finish': []}
+        for table in soup.find_all('table'):
+            tables['all'].append(table)
+            if table.get('border') == 'border':
+                tables['horse_tables'].append(table)
+            header = table.find('td', class_='bld')
+            if header and 'PREDICTED FINISH' in header.get_text():
+                tables['predicted_finish'].append(table)
+        return tables
+
     def _debug_horse_tables(self, horse_tables):
         """Debug method to analyze horse tables"""
         self.stdout.write("\n" + "="*50)
@@ -500,16 +566,15 @@ class Command(BaseCommand):
             b1_divs = table.find_all('div', class_='b1')
             self.stdout.write(f"b1 divs found: {len(b1_divs)}")
             
-            numbers = re.findall(r'\b\d+\b', table.get_text())
+            numbers = _WORD_NUMBER_RE.findall(table.get_text())
             self.stdout.write(f"Numbers found: {numbers}")
         
         self.stdout.write("="*50 + "\n")
 
 
 
-    def _debug_tables(self, soup):
+    def _debug_tables(self, tables):
         """Debug function to see all tables in the HTML"""
-        tables = soup.find_all('table')
         self.stdout.write(f"\n🔍 Found {len(tables)} tables in the HTML:")
         
         for i, table in enumerate(tables):
@@ -570,27 +635,35 @@ class Command(BaseCommand):
         """Calculate scores for all horses in a race and create rankings"""
         self.stdout.write(f"\n📊 Calculating scores for Race {race.race_no}...")
         created = False  # Initialize the variable
-        horses = Horse.objects.filter(race=race)
-        self.stdout.write(f"Found {horses.count()} horses in database for this race")
+        # One query for the horses instead of COUNT + iteration, with the race
+        # joined and only the columns the scoring and ranking code reads
+        horses = list(
+            Horse.objects.filter(race=race)
+            .select_related('race')
+            .only(
+                'id', 'race', 'horse_no', 'horse_name', 'speed_rating', 'horse_merit',
+                'best_merit_rating', 'jt_score', 'jt_rating', 'jockey', 'trainer',
+            )
+        )
+        self.stdout.write(f"Found {len(horses)} horses in database for this race")
         
         scores_data = []
+        # Score rows are built per horse and upserted together after the loop
+        existing_ids = set(HorseScore.objects.filter(race=race).values_list('horse_id', flat=True))
+        to_save = []
         all_scores = []  # Track all scores to check for differences
         
         for horse in horses:
             try:
-                self.stdout.write(f"\n    🐎 Processing {horse.horse_name} (No. {horse.horse_no})...")
-
-
-                # DEBUG: Verify we have a Horse object
-                if not isinstance(horse, Horse):
-                    self.stdout.write(f"❌ ERROR: Expected Horse object, got {type(horse)}: {horse}")
-                    continue
-                
                 # DEBUG: Check horse attributes
-                self.stdout.write(f"      Horse ID: {horse.id}, Name: '{horse.horse_name}'")
+                if self.debug:
+                    self.stdout.write(f"\n    🐎 Processing {horse.horse_name} (No. {horse.horse_no})...")
+                    self.stdout.write(f"      Horse ID: {horse.id}, Name: '{horse.horse_name}'")
                 
-                scoring_service = BaseCommand(horse, race, debug_callback=self.stdout.write)
-                score_record, created = scoring_service.create_score_record()
+                scoring_service = HorseScoringService(horse, race, debug_callback=self.stdout.write if self.debug else None)
+                score_record = scoring_service.build_score_record()
+                created = horse.id not in existing_ids
+                to_save.append(score_record)
                 
                 # Or use the factory function if you need lookup capability
                 # scoring_service = create_scoring_service(horse, race, debug_callback=self.stdout.write)
@@ -624,7 +697,9 @@ class Command(BaseCommand):
                 
                 # Pass the horse object directly, not the name
                 scoring_service = HorseScoringService(horse, race, debug_callback=self.stdout.write)
-                score_record, created = scoring_service.create_score_record()
+                score_record = scoring_service.build_score_record()
+                created = horse.id not in existing_ids
+                to_save.append(score_record)
 
 
                 
@@ -703,9 +778,6 @@ class Command(BaseCommand):
                 manual_score = weighted_form + weighted_class + weighted_jockey + weighted_trainer + weighted_speed
                 self.stdout.write(f"      🧾 Manual calculation: {manual_score:.2f}")
                 
-                # Create the score record using the service (this might use different logic)
-                score_record, created = scoring_service.create_score_record()
-                
                 status = "Created" if created else "Updated"
                 self.stdout.write(f"    ✅ {status} score for {horse.horse_name}: {score_record.overall_score}")
                 
@@ -730,6 +802,16 @@ class Command(BaseCommand):
                 import traceback
                 self.stdout.write(traceback.format_exc())
         
+        # One upsert for the race's score rows (HorseScore is unique on horse + race)
+        if to_save:
+            # The upsert's UPDATE skips auto_now, so stamp updated_at here
+            now = timezone.now()
+            for score_record in to_save:
+                score_record.updated_at = now
+            self._upsert_race_rows(
+                HorseScore, to_save, ['horse', 'race'], HorseScoringService.SCORE_UPDATE_FIELDS, existing_ids
+            )
+        
         # Check if scores are different with more detailed analysis
         if all_scores:
             unique_scores = set(all_scores)
@@ -808,11 +890,11 @@ class Command(BaseCommand):
     
 
 
-    def _parse_jockey_trainer_table(self, soup):
-        """Find and parse jockey-trainer statistics table"""
+    def _parse_jockey_trainer_table(self, tables):
+        """Find and parse the jockey-trainer statistics table among `tables`"""
         jt_analysis_data = {}
         
-        for i, table in enumerate(soup.find_all('table')):
+        for i, table in enumerate(tables):
             if table.get('class') and 'small' in table.get('class'):
                 continue
                 
@@ -1018,6 +1100,9 @@ class Command(BaseCommand):
         
         rankings_created = 0
         rankings_updated = 0
+        # Rankings are built per horse and upserted together after the loop
+        existing_ids = set(Ranking.objects.filter(race=race).values_list('horse_id', flat=True))
+        to_save = []
         
         for position, data in enumerate(sorted_rankings, 1):
             horse = data['horse']
@@ -1034,29 +1119,17 @@ class Command(BaseCommand):
                 f"{score_record.jt_score:<6} "
                 f"{score_record.form_score:<6} "
                 f"{score_record.class_score:<6} "
-                f"{score_record.speed_rating:<6} "
+                f"{score_record.speed_score:<6} "
             )
             
-            # ✅ SAVE TO DATABASE
+            # ✅ SAVE TO DATABASE (queued for the bulk upsert below)
             try:
-                ranking, created = Ranking.objects.update_or_create(
-                    race=race,
-                    horse=horse,
-                    defaults={
-                        'rank': position,
-                        'score': score_record.overall_score,
-                        'merit_score': score_record.current_mr_score,
-                        'class_score': score_record.class_score,
-                        'form_score': score_record.form_score,
-                        'jt_score': score_record.jt_score,
-                        'jt_rating': getattr(horse, 'jt_rating', ''),
-                        'jockey': getattr(horse, 'jockey', ''),
-                        'trainer': getattr(horse, 'trainer', ''),
-                        'class_trend': 'stable',
-                    }
-                )
+                defaults = {'rank': position}
+                for name in self.RANKING_SCORE_FIELDS:
+                    defaults[name] = getattr(score_record, name)
+                to_save.append(Ranking(race=race, horse=horse, **defaults))
                 
-                if created:
+                if horse.id not in existing_ids:
                     rankings_created += 1
                     self.stdout.write(f"      💾 Saved to database as position #{position}")
                 else:
@@ -1068,6 +1141,11 @@ class Command(BaseCommand):
                 import traceback
                 self.stdout.write(traceback.format_exc())
         
+        if to_save:
+            self._upsert_race_rows(
+                Ranking, to_save, ['race', 'horse'], ['rank'] + self.RANKING_SCORE_FIELDS, existing_ids
+            )
+        
         self.stdout.write("=" * 100)
         
         # Show summary
@@ -1076,6 +1154,37 @@ class Command(BaseCommand):
         
         return rankings_created + rankings_updated
     
+    def _upsert_race_rows(self, model, rows, unique_fields, update_fields, existing_ids):
+        """
+        Upsert one race's per-horse rows in a single statement. If that fails,
+        write them one at a time, so one bad row doesn't lose the race.
+        """
+        try:
+            # Savepoint, so a failed statement leaves any outer transaction usable
+            with transaction.atomic():
+                model.objects.bulk_create(
+                    rows,
+                    update_conflicts=True,
+                    unique_fields=unique_fields,
+                    update_fields=update_fields,
+                    batch_size=BULK_BATCH_SIZE,
+                )
+            return
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f"❌ Bulk {model.__name__} write failed, saving one by one: {e}"))
+        
+        for row in rows:
+            try:
+                with transaction.atomic():
+                    if row.horse_id in existing_ids:
+                        model.objects.filter(race_id=row.race_id, horse_id=row.horse_id).update(
+                            **{name: getattr(row, name) for name in update_fields}
+                        )
+                    else:
+                        row.save()
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"    ❌ Error saving {model.__name__} for {row.horse.horse_name}: {e}"))
+    
     # Add this to your command file
 def find_bad_queries():
     """Function to help identify where bad queries are coming from"""
@@ -3,10 +3,46 @@ import logging
 from typing import Optional
 from django.db import models
 
+from racecard_02.models import HorseScore
+
 logger = logging.getLogger(__name__)
 
 class HorseScoringService:
     """Scoring service for calculating horse scores"""
+    
+    # HorseScore columns produced by score_fields (bulk_update field list)
+    SCORE_FIELDS = [
+        'overall_score', 'best_mr_score', 'current_mr_score', 'jt_score',
+        'form_score', 'class_score', 'speed_score',
+    ]
+    
+    # Columns a bulk re-score writes: updated_at is auto_now, which
+    # bulk_update and bulk_create(update_conflicts=True) don't touch, so
+    # callers set it on the rows themselves
+    SCORE_UPDATE_FIELDS = SCORE_FIELDS + ['updated_at']
+    
+    # NOT NULL HorseScore columns this service doesn't score yet; neutral 50
+    # so a new row can be inserted
+    UNSCORED_DEFAULTS = {
+        'consistency_score': 50.0,
+        'physical_score': 50.0,
+        'intangible_score': 50.0,
+        'speed_rating_score': 50.0,
+        'odds_score': 50.0,
+        'weight_score': 50.0,
+        'draw_score': 50.0,
+        'blinkers_score': 50.0,
+    }
+    
+    WEIGHTS = {
+        'best_mr': 0.2,
+        'current_mr': 0.15,
+        'jt': 0.2,
+        'form': 0.15,
+        'class': 0.15,
+        'speed': 0.15
+    }
+
     def __init__(self, horse, race, debug_callback=None):
         self.horse = horse
         self.race = race
@@ -18,34 +54,39 @@ class HorseScoringService:
         if self.debug_callback:
             self.debug_callback(message)
     
+    def score_fields(self) -> dict:
+        """Compute every HorseScore component for this horse without touching the DB"""
+        fields = {
+            'best_mr_score': self._calculate_best_mr_score(),
+            'current_mr_score': self._calculate_current_mr_score(),
+            'jt_score': self._calculate_jt_score(),
+            'form_score': self._calculate_form_score(),
+            'class_score': self._calculate_class_score(),
+            'speed_score': self._calculate_speed_score(),
+        }
+        fields['overall_score'] = self._weighted_overall(fields)
+        return fields
+    
+    def build_score_record(self):
+        """Unsaved HorseScore for this horse and race, for the caller to bulk write"""
+        return HorseScore(horse=self.horse, race=self.race,
+                          **self.UNSCORED_DEFAULTS, **self.score_fields())
+    
     def create_score_record(self):
         """Create or update a HorseScore record for this horse and race"""
         try:
+            fields = self.score_fields()
             # Use local HorseScore model instead of rankings.models
             score_record, created = HorseScore.objects.get_or_create(
                 horse=self.horse,
                 race=self.race,
-                defaults={'overall_score': self.calculate_overall_score()}
+                defaults={**self.UNSCORED_DEFAULTS, **fields}
             )
             
             # Update all score components
             if not created:
-                score_record.overall_score = self.calculate_overall_score()
-                score_record.best_mr_score = self._calculate_best_mr_score()
-                score_record.current_mr_score = self._calculate_current_mr_score()
-                score_record.jt_score = self._calculate_jt_score()
-                score_record.form_score = self._calculate_form_score()
-                score_record.class_score = self._calculate_class_score()
-                score_record.speed_score = self._calculate_speed_score()
-                score_record.save()
-            else:
-                # For new records, set all components
-                score_record.best_mr_score = self._calculate_best_mr_score()
-                score_record.current_mr_score = self._calculate_current_mr_score()
-                score_record.jt_score = self._calculate_jt_score()
-                score_record.form_score = self._calculate_form_score()
-                score_record.class_score = self._calculate_class_score()
-                score_record.speed_score = self._calculate_speed_score()
+                for name, value in fields.items():
+                    setattr(score_record, name, value)
                 score_record.save()
             
             return score_record, created
@@ -56,29 +97,17 @@ class HorseScoringService:
     
     def calculate_overall_score(self) -> float:
         """Calculate overall score with weighted components"""
-        weights = {
-            'best_mr': 0.2,
-            'current_mr': 0.15,
-            'jt': 0.2,
-            'form': 0.15,
-            'class': 0.15,
-            'speed': 0.15
-        }
-        
-        best_mr_score = self._calculate_best_mr_score()
-        current_mr_score = self._calculate_current_mr_score()
-        jt_score = self._calculate_jt_score()
-        form_score = self._calculate_form_score()
-        class_score = self._calculate_class_score()
-        speed_score = self._calculate_speed_score()
-        
+        return self.score_fields()['overall_score']
+    
+    def _weighted_overall(self, fields: dict) -> float:
+        """Weighted sum of the component scores, clamped to 0-100"""
         overall_score = (
-            best_mr_score * weights['best_mr'] +
-            current_mr_score * weights['current_mr'] +
-            jt_score * weights['jt'] +
-            form_score * weights['form'] +
-            class_score * weights['class'] +
-            speed_score * weights['speed']
+            fields['best_mr_score'] * self.WEIGHTS['best_mr'] +
+            fields['current_mr_score'] * self.WEIGHTS['current_mr'] +
+            fields['jt_score'] * self.WEIGHTS['jt'] +
+            fields['form_score'] * self.WEIGHTS['form'] +
+            fields['class_score'] * self.WEIGHTS['class'] +
+            fields['speed_score'] * self.WEIGHTS['speed']
         )
         
         return max(0, min(100, overall_score))
@@ -187,7 +216,8 @@ class HorseScoringService:
                 jt_score=50,
                 form_score=50,
                 class_score=50,
-                speed_score=50
+                speed_score=50,
+                **self.UNSCORED_DEFAULTS
             )
             return score_record, True
         except Exception as e: